@@ -1,36 +1,77 @@
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-import subprocess
+from contextlib import asynccontextmanager
 import os
 import json
-import uuid
-import csv
-import re
-import shutil
-from typing import Dict, List
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, Response, PlainTextResponse
 from dotenv import load_dotenv
-from openai import OpenAI
+from note_writer import NoteWriter
+from results_reader import ResultsReader
+from browser_pool import BrowserPool
+from export_package import export_manifest, cached_archive, stream_archive
+from job_events import format_sse
+from timing import merge_snapshots, prometheus_text
+from job_scheduler import JobScheduler, JOBS_DIR, FINISHED_STATES
+from netflix_scraper import scrape_netflix_data, HEADLESS, OUTPUT_DIR, CSV_FILE
+from checkpoint import Checkpoint, CHECKPOINT_DIR
+import run_log
 
-app = FastAPI()
+# One warm Chromium shared by scrape jobs and title renders for the life of the process
+browser_pool = BrowserPool(headless=HEADLESS)
+
+async def run_scraper_task(job: dict):
+    # The scraper runs in-process on the shared browser pool, writing into the job's own workspace;
+    # its log lines and progress events go straight into the job's ring buffer
+    token = run_log.set_sink(job["events"])
+    checkpoint_dir = job_path(job, CHECKPOINT_DIR)
+    # A job queued again by /api/jobs/{id}/resume picks up from the checkpoint in its workspace
+    resume = os.path.exists(Checkpoint(job["id"], checkpoint_dir).path)
+    try:
+        await scrape_netflix_data(job["start_date"], job["end_date"], browser_pool=browser_pool,
+                                  output_dir=job_path(job, OUTPUT_DIR), csv_file=job_path(job, CSV_FILE),
+                                  run_id=job["id"], resume=resume, checkpoint_dir=checkpoint_dir,
+                                  resume_hint=f"POST /api/jobs/{job['id']}/resume")
+    finally:
+        run_log.reset_sink(token)
+
+def job_path(job: dict, *parts):
+    return os.path.join(job["workspace"], *parts)
+
+# Parsed job CSVs, shared by /api/results and note generation
+results_reader = ResultsReader()
+
+# Jobs beyond MAX_CONCURRENT_JOBS wait in a FIFO queue; metadata survives restarts in jobs.db
+scheduler = JobScheduler(run_scraper_task)
+
+@asynccontextmanager
+async def lifespan(app):
+    await browser_pool.start()
+    await scheduler.start()
+    yield
+    await scheduler.stop()
+    await browser_pool.stop()
+    if note_writer:
+        await note_writer.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Load env
 load_dotenv()
 try:
-    client = OpenAI(
+    # Async client: the LLM round trip no longer blocks the event loop (timeout/concurrency via NOTE_* env)
+    note_writer = NoteWriter(
         api_key=os.getenv("OPENAI_API_KEY"),
         base_url=os.getenv("OPENAI_BASE_URL")
     )
 except Exception as e:
     print(f"Warning: OpenAI client init failed: {e}")
-    client = None
+    note_writer = None
 
-# Mount images directory
-if not os.path.exists("images"):
-    os.makedirs("images")
-app.mount("/images", StaticFiles(directory="images"), name="images")
+# Job workspaces: /jobs/<job_id>/images/<poster>
+# follow_symlink: posters may be symlinks into poster_store/ when it sits on another filesystem
+app.mount("/jobs", StaticFiles(directory=JOBS_DIR, follow_symlink=True), name="jobs")
 
 # Enable CORS for frontend communication
 app.add_middleware(
@@ -38,228 +79,224 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count"],
 )
 
-# In-memory job store
-jobs: Dict[str, dict] = {}
-
 class ScrapeRequest(BaseModel):
     start_date: str = None
     end_date: str = None
 
-def run_scraper_task(job_id: str, start: str, end: str):
-    jobs[job_id]["status"] = "running"
-    
-    cmd = ["python3", "netflix_scraper.py"]
-    if start: cmd.extend(["--start", start])
-    if end: cmd.extend(["--end", end])
-    
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-        universal_newlines=True
-    )
-    
-    for line in process.stdout:
-        stripped = line.strip()
-        if not stripped:
-            continue
-        jobs[job_id]["logs"].append(stripped)
-        # Parse progress from various output formats
-        # Matches: "[3] Title (date)" or "Collected X items" or "Total: X"
-        count_match = re.search(r'\[(\d+)\]', stripped)
-        if count_match:
-            jobs[job_id]["count"] = int(count_match.group(1))
-        total_match = re.search(r'Total:\s*(\d+)', stripped)
-        if total_match:
-            jobs[job_id]["count"] = int(total_match.group(1))
-            
-    process.wait()
-    jobs[job_id]["status"] = "completed" if process.returncode == 0 else "failed"
+def resolve_job(job_id: str = None):
+    """The named job, or the most recent one when the caller doesn't say."""
+    return scheduler.get(job_id) if job_id else scheduler.latest()
 
 @app.post("/api/scrape")
-async def start_scrape(request: ScrapeRequest, background_tasks: BackgroundTasks):
-    job_id = str(uuid.uuid4())
-    jobs[job_id] = {
-        "status": "pending",
-        "logs": [],
-        "count": 0,
-        "start_date": request.start_date,
-        "end_date": request.end_date
-    }
-    
-    # Cleanup old data if starting a new run
-    if os.path.exists("netflix_records.csv"):
-        os.remove("netflix_records.csv")
-    if os.path.exists("images"):
-        # We don't delete the whole images folder to preserve cache if needed, 
-        # but for a clean run arguably we should? 
-        # User request implies they want ONLY the date range content.
-        # Let's clean it to be safe and avoid confusion.
-        shutil.rmtree("images")
-        os.makedirs("images")
-        
-    background_tasks.add_task(run_scraper_task, job_id, request.start_date, request.end_date)
-    return {"job_id": job_id}
+async def start_scrape(request: ScrapeRequest):
+    # Each job scrapes into a fresh workspace, so nothing from other (possibly running) jobs is touched
+    job = scheduler.submit(request.start_date, request.end_date)
+    return {"job_id": job["id"], "status": job["status"], "queue_position": scheduler.queue_position(job["id"])}
+
+@app.get("/api/jobs")
+async def list_jobs():
+    return [scheduler.describe(job) for job in sorted(scheduler.jobs.values(), key=lambda job: job["created_at"], reverse=True)]
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    if not scheduler.get(job_id):
+        return {"error": "Job not found"}
+    if not scheduler.cancel(job_id):
+        return {"error": "Job already finished"}
+    return {"job_id": job_id, "cancelled": True}
+
+@app.post("/api/jobs/{job_id}/resume")
+async def resume_job(job_id: str):
+    if not scheduler.get(job_id):
+        return {"error": "Job not found"}
+    if not scheduler.resume(job_id):
+        return {"error": "Only interrupted or failed jobs can be resumed"}
+    return {"job_id": job_id, "resumed": True, "queue_position": scheduler.queue_position(job_id)}
 
 @app.get("/api/status/{job_id}")
 async def get_status(job_id: str):
-    if job_id not in jobs:
+    job = scheduler.get(job_id)
+    if not job:
+        return {"error": "Job not found"}
+    # Only the tail of the log; the full (bounded) stream is on /api/events/{job_id}
+    return {
+        "status": job["status"],
+        "count": job["count"],
+        "start_date": job["start_date"],
+        "end_date": job["end_date"],
+        "queue_position": scheduler.queue_position(job_id),
+        "error": job["error"],
+        "timings": timing_breakdown(job["metrics"]),
+        "counters": job["metrics"].get("counters", {}),
+        "logs": job["events"].recent_logs(),
+        "cursor": job["events"].seq,
+    }
+
+def timing_breakdown(snapshot: dict):
+    # Where the run's time went: total seconds and call count per stage, slowest first
+    stages = snapshot.get("stages", {})
+    return {name: {"seconds": round(hist["sum"], 3), "count": hist["count"]}
+            for name, hist in sorted(stages.items(), key=lambda item: -item[1]["sum"])}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape target: stage histograms and counters summed over this process's jobs."""
+    text = prometheus_text(merge_snapshots(job["metrics"] for job in scheduler.jobs.values()))
+    statuses = {}
+    for job in scheduler.jobs.values():
+        statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+    lines = ["# TYPE scraper_jobs gauge"]
+    lines += [f'scraper_jobs{{status="{status}"}} {n}' for status, n in sorted(statuses.items())]
+    lines += ["# TYPE scraper_queue_length gauge", f"scraper_queue_length {len(scheduler.queue)}"]
+    return PlainTextResponse(text + "\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@app.get("/api/events/{job_id}")
+async def stream_events(job_id: str, request: Request, cursor: int = 0):
+    """
+    Server-sent events for a job. Each event carries its seq as the SSE id, so a reconnecting
+    EventSource resumes via Last-Event-ID; `cursor` does the same for a fresh client.
+    """
+    job = scheduler.get(job_id)
+    if not job:
         return {"error": "Job not found"}
-    return jobs[job_id]
+    events = job["events"]
+    last_id = request.headers.get("last-event-id")
+    if last_id and last_id.isdigit():
+        cursor = int(last_id)
+
+    async def publish():
+        nonlocal cursor
+        while True:
+            batch, dropped = events.since(cursor)
+            if dropped:
+                yield f"data: {json.dumps({'seq': cursor, 'type': 'gap', 'data': {'dropped': dropped}})}\n\n"
+            for event in batch:
+                yield format_sse(event)
+                cursor = event["seq"]
+            if job["status"] in FINISHED_STATES and events.seq <= cursor:
+                return
+            if await request.is_disconnected():
+                return
+            if not await events.wait(cursor, timeout=15):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(publish(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/health")
+async def health():
+    return {
+        "browser_pool": browser_pool.health(),
+        "results_cache": {"files": len(results_reader.entries), "hits": results_reader.hits, "loads": results_reader.loads},
+    }
 
 @app.get("/api/results")
-async def get_results():
-    CSV_FILE = "netflix_records.csv"
-    if not os.path.exists(CSV_FILE):
+async def get_results(request: Request, job_id: str = None, since: int = 0, offset: int = 0, limit: int = None,
+                      start_date: str = None, end_date: str = None, title: str = None, fields: str = None):
+    """
+    Rows of a job's CSV (the streaming .part file while the scrape runs), served from the shared
+    in-memory cache. `offset`/`limit` page the filtered rows (`since` is the older name for offset),
+    X-Total-Count carries the filtered total, `fields` is a comma-separated column list.
+    """
+    job = resolve_job(job_id)
+    if not job:
         return []
-    
-    results = []
-    with open(CSV_FILE, mode='r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            results.append(row)
-    return results
+    rows, total, etag = results_reader.query(
+        job_path(job, CSV_FILE), offset=offset or since, limit=limit, start_date=start_date, end_date=end_date,
+        title=title, fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None)
+    headers = {"X-Total-Count": str(total), "Cache-Control": "no-cache"}
+    if etag:
+        headers["ETag"] = etag
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+    return JSONResponse(rows, headers=headers)
 
 @app.get("/api/download")
-async def download_package():
-    zip_filename = "netflix_scraper_export"
-    zip_path = f"{zip_filename}.zip"
-    
-    # Ensure any old zip is removed
-    if os.path.exists(zip_path):
-        os.remove(zip_path)
-        
-    temp_export_dir = "temp_export"
-    if os.path.exists(temp_export_dir):
-        shutil.rmtree(temp_export_dir)
-        
-    os.makedirs(temp_export_dir)
-    images_dest = os.path.join(temp_export_dir, "images")
-    if not os.path.exists(images_dest):
-        os.makedirs(images_dest)
-    
-    # 1. Copy Title Page if exists
-    title_page = os.path.join("images", "Title_Page.jpg")
-    if os.path.exists(title_page):
-        shutil.copy(title_page, temp_export_dir)
-
-    # 2. Copy scraped images (but NOT CSV)
-    if os.path.exists("images"):
-        # We want images in an 'images' subfolder or root? User said "images/" folder
-        # Let's keep them in 'images' subfolder inside zip for cleanliness, 
-        # or root if they want flat list.
-        # Plan said: "Zip should contain images/ folder with posters AND the title page."
-        # So structure:
-        #   netflix_data.zip/
-        #       Title_Page.jpg
-        #       images/
-        #           poster1.jpg
-        #           ...
-        
-        # images_dest is already temp_export_dir/images
-        for item in os.listdir("images"):
-            if item == "Title_Page.jpg": continue # Already copied to root
-            if not item.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')): continue
-            
-            s = os.path.join("images", item)
-            d = os.path.join(images_dest, item)
-            if os.path.isfile(s):
-                shutil.copy2(s, d)
-
-    # Create zip from temp dir
-    shutil.make_archive(zip_filename, 'zip', temp_export_dir)
-    
-    # Cleanup temp dir
-    shutil.rmtree(temp_export_dir)
-    
-    return FileResponse(zip_path, filename="netflix_data.zip", media_type='application/zip')
+async def download_package(job_id: str = None):
+    job = resolve_job(job_id)
+    if not job:
+        return {"error": "Job not found"}
+    # The archive is keyed by a hash of file names, sizes and mtimes: an unchanged run is served
+    # from the cached zip, anything else is streamed straight out of images/ (and cached on the way).
+    entries = export_manifest(job_path(job, OUTPUT_DIR))
+    cached = cached_archive(entries)
+    if cached:
+        return FileResponse(cached, filename="netflix_data.zip", media_type='application/zip')
+    return StreamingResponse(
+        stream_archive(entries),
+        media_type='application/zip',
+        headers={"Content-Disposition": 'attachment; filename="netflix_data.zip"'}
+    )
 
 class NoteRequest(BaseModel):
+    job_id: str = None
     start_date: str = None
     end_date: str = None
     override_title: str = None
     override_tags: str = None
+    stream: bool = False
 
 @app.post("/api/generate_note")
 async def generate_note(request: NoteRequest):
-    if not client:
+    if not note_writer:
         return {"error": "OpenAI client not initialized. Check .env file."}
         
-    # Read CSV and filter
-    movies = []
-    headers = []
-    if os.path.exists("netflix_records.csv"):
-        with open("netflix_records.csv", mode='r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Filter by date if provided
-                # Date format in CSV is "YYYY/M/D" usually
-                # Simple string comparison works if strict, but let's just include all for now 
-                # or implement basic filtering if strings match.
-                # The user scraper filters BEFORE saving to CSV usually? 
-                # No, scraper appends? 
-                # Actually, app.py cleans CSV on new run (lines 82-83), so CSV contains ONLY current run.
-                # So we can just use all rows in CSV.
-                movies.append(f"{row.get('Title')} (Released: {row.get('Release Date')})")
+    job = resolve_job(request.job_id)
+    csv_path = job_path(job, CSV_FILE) if job else CSV_FILE
+
+    # Same cached rows as /api/results, limited to the requested date range
+    rows, _, _ = results_reader.query(csv_path, start_date=request.start_date, end_date=request.end_date,
+                                      fields=["Title", "Release Date"])
+    movies = [f"{row.get('Title')} (Released: {row.get('Release Date')})" for row in rows]
     
     if not movies:
         return {"note": "No movies found to generate a note for. Please scrape first!"}
-        
-    movie_list_str = "\n".join(movies)
-    
-    prompt = f"""
-    You are a popular movie blogger on Xiaohongshu (Little Red Book). 
-    Write an enthusiastic, emoji-filled post recommending these new Netflix movies.
-    
-    Movies:
-    {movie_list_str}
-    
-    Requirements:
-    1. Catchy Title with emojis. {f'MUST be exactly: "{request.override_title}"' if request.override_title else 'MUST be under 20 characters (including emojis).'}
-    2. Enthusiastic tone.
-    3. Brief mention of the movies.
-    4. Use tags like {request.override_tags if request.override_tags else '#Netflix #NewMovies #WeekendVibes #MovieRecommendation'}.
-    5. Language: Chinese (Simplified).
-    6. STRICTLY FORBIDDEN: Do NOT use markdown bold syntax (**text**) or any markdown formatting. Use plain text and emojis only.
-    7. Ensure the content is structured for mobile reading (short paragraphs).
-    """
-    
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant specialized in social media content creation."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        note_content = completion.choices[0].message.content
-        # Post-processing to remove any markdown bold syntax if it still appears
-        note_content = note_content.replace("**", "").replace("__", "")
-        return {"note": note_content}
-    except Exception as e:
-        return {"error": str(e)}
+
+    if not request.stream:
+        try:
+            return {"note": await note_writer.generate(movies, request.override_title, request.override_tags)}
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def publish():
+        # Same SSE framing as /api/events: "delta" events carry tokens, "done" the cleaned note
+        try:
+            async for item in note_writer.stream(movies, request.override_title, request.override_tags):
+                if item[0] == "delta":
+                    payload = {"type": "delta", "text": item[1]}
+                else:
+                    payload = {"type": "done", "note": item[1], "cached": item[2]}
+                yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+    return StreamingResponse(publish(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 from title_generator.generate_image import generate_title_image
 
 class TitleRequest(BaseModel):
+    job_id: str = None
     date_range: str
     title: str = "收视冠军"
 
 @app.post("/api/generate_title")
 async def generate_title(request: TitleRequest):
+    job = resolve_job(request.job_id)
+    if not job:
+        return {"error": "Job not found"}
     try:
-        # Output to "images/Title_Page.jpg"
-        # Use simple fixed name for now or timestamp?
-        # User wants it in the package. So "images/Title_Page.jpg" is good.
-        output_path = os.path.join(os.getcwd(), "images", "Title_Page.jpg")
+        # Output to "<workspace>/images/Title_Page.jpg" so it ships in that job's package
+        output_path = os.path.abspath(job_path(job, OUTPUT_DIR, "Title_Page.jpg"))
         
         # Run in executor to avoid blocking event loop? Playwright sync api blocks.
         # But for local tool it's fine.
-        generated_path = await generate_title_image(request.title, request.date_range, output_path)
+        generated_path = await generate_title_image(request.title, request.date_range, output_path,
+                                                    browser_pool=browser_pool)
         
         if generated_path and os.path.exists(generated_path):
             return {"image_url": "Title_Page.jpg", "full_path": generated_path}
@@ -0,0 +1,134 @@
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+from run_log import log
+
+POOL_SIZE = 1  # Chromium processes; each hands out any number of isolated contexts
+MAX_USES = 50  # Contexts served by one browser before it is replaced with a fresh one
+
+
+class _Slot:
+    def __init__(self, browser):
+        self.browser = browser
+        self.uses = 0
+        self.active = 0
+        self.retired = False
+
+
+class BrowserPool:
+    """
+    Process-wide warm Chromium pool for the API. Scrape jobs and title renders borrow isolated
+    contexts from it instead of launching a browser per request.
+
+    A browser that has disconnected is replaced before the next checkout, and one that has served
+    max_uses contexts is retired: it takes no new work and is closed once its last context closes.
+    If Chromium can't be launched at startup, the API still comes up and each checkout retries the
+    launch, so only the jobs that need a browser fail.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES, headless=True):
+        self.size = size
+        self.max_uses = max_uses
+        self.headless = headless
+        self.playwright = None
+        self.slots = []
+        self.lock = asyncio.Lock()
+        self.launches = 0
+
+    async def start(self):
+        try:
+            await self._fill()
+        except Exception as e:
+            log(f"Browser pool: Chromium could not be launched ({e}); retrying when a browser is needed")
+            return
+        log(f"Browser pool ready ({self.size} browser(s), recycled every {self.max_uses} uses)")
+
+    async def _fill(self):
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        while len(self.slots) < self.size:
+            self.slots.append(await self._launch())
+
+    async def stop(self):
+        for slot in self.slots:
+            await self._close(slot)
+        self.slots = []
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
+
+    async def _launch(self):
+        self.launches += 1
+        return _Slot(await self.playwright.chromium.launch(headless=self.headless))
+
+    async def _close(self, slot):
+        try:
+            await slot.browser.close()
+        except Exception:
+            pass
+
+    async def _checkout(self):
+        async with self.lock:
+            if len(self.slots) < self.size:
+                await self._fill()
+            for i, slot in enumerate(self.slots):
+                if slot.retired:
+                    continue
+                if not slot.browser.is_connected():
+                    log("Browser pool: replacing a disconnected browser")
+                    slot.retired = True
+                    self.slots[i] = await self._launch()
+                elif slot.uses >= self.max_uses:
+                    slot.retired = True
+                    self.slots[i] = await self._launch()
+                    if slot.active == 0:
+                        await self._close(slot)
+            slot = min(self.slots, key=lambda s: s.active)
+            slot.uses += 1
+            slot.active += 1
+            return slot
+
+    async def _checkin(self, slot):
+        slot.active -= 1
+        if slot.retired and slot.active == 0:
+            await self._close(slot)
+
+    @asynccontextmanager
+    async def context(self, **kwargs):
+        slot = await self._checkout()
+        context = None
+        try:
+            context = await slot.browser.new_context(**kwargs)
+            yield context
+        finally:
+            if context:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            await self._checkin(slot)
+
+    def health(self):
+        return {
+            "browsers": [
+                {"connected": s.browser.is_connected(), "uses": s.uses, "active_contexts": s.active}
+                for s in self.slots
+            ],
+            "launches": self.launches,
+            "max_uses": self.max_uses,
+        }
+
+
+@asynccontextmanager
+async def open_context(pool=None, headless=True, **kwargs):
+    """A browser context from `pool` when running inside the API, or from a one-off Chromium otherwise."""
+    if pool:
+        async with pool.context(**kwargs) as context:
+            yield context
+        return
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            yield await browser.new_context(**kwargs)
+        finally:
+            await browser.close()
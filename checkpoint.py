@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import uuid
+
+CHECKPOINT_DIR = "checkpoints"
+ITEM_RETRIES = 3  # Attempts per listing item before it is given up as failed
+RETRY_QUEUE_SIZE = 50  # Items waiting for a retry at once; failures beyond this are given up immediately
+RETRY_BACKOFF = 1.0  # Seconds before a retry round, times the round number
+
+
+class Checkpoint:
+    """
+    Resumable state of one scrape run, rewritten atomically to `<root>/<run_id>.json` after every
+    listing page: the run's parameters, completed pages, accepted records, records still waiting
+    for their synopsis, posters not downloaded yet and items that failed every retry.
+    """
+
+    def __init__(self, run_id=None, root=CHECKPOINT_DIR, params=None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.root = root
+        self.path = os.path.join(root, f"{self.run_id}.json")
+        self.state = {
+            "run_id": self.run_id,
+            "status": "running",
+            "params": params or {},
+            "created_at": time.time(),
+            "updated_at": None,
+            "completed_pages": [],
+            "base_count": 0,
+            "records": [],
+            "pending_details": [],
+            "pending_downloads": [],
+            "failed": [],
+        }
+
+    @classmethod
+    def load(cls, run_id, root=CHECKPOINT_DIR):
+        """Raises FileNotFoundError for an unknown run."""
+        checkpoint = cls(run_id, root)
+        with open(checkpoint.path, encoding="utf-8") as f:
+            checkpoint.state.update(json.load(f))
+        return checkpoint
+
+    @property
+    def params(self):
+        return self.state["params"]
+
+    @property
+    def completed_pages(self):
+        return set(self.state["completed_pages"])
+
+    def save(self, status="running", **fields):
+        """Updates the given state fields (records, pending_details, ...) and writes the file."""
+        self.state.update(fields, status=status, updated_at=time.time())
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.path + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def complete_page(self, page_num, **fields):
+        if page_num not in self.state["completed_pages"]:
+            self.state["completed_pages"].append(page_num)
+        self.save(**fields)
+
+
+class RetryQueue:
+    """
+    Bounded queue of listing items whose processing raised. Each item is replayed up to
+    `max_attempts` times in total; once it runs out of attempts, or the queue is full, it is
+    recorded in `failed` with its last error and listing page instead.
+
+    A card's "index" is its DOM position on that page, so failures carried over from a checkpoint
+    wait in `deferred` until their own page is loaded again.
+    """
+
+    def __init__(self, max_attempts=ITEM_RETRIES, max_size=RETRY_QUEUE_SIZE, backoff=RETRY_BACKOFF):
+        self.max_attempts = max_attempts
+        self.max_size = max_size
+        self.backoff = backoff
+        self.queue = []
+        self.attempts = {}
+        self.failed = []
+        self.deferred = {}  # page -> items
+
+    def fail(self, item, error, page=None):
+        """Returns True if the item will be retried, False if it was given up."""
+        key = item.get("href")
+        self.attempts[key] = self.attempts.get(key, 0) + 1
+        if self.attempts[key] < self.max_attempts and len(self.queue) < self.max_size:
+            self.queue.append(item)
+            return True
+        self.failed.append({"item": item, "error": str(error)[:200], "attempts": self.attempts[key], "page": page})
+        return False
+
+    def requeue(self, failed):
+        """Gives items recorded as failed (e.g. by a checkpoint) a fresh set of attempts, on their own page."""
+        for entry in failed:
+            self.attempts.pop(entry["item"].get("href"), None)
+            self.deferred.setdefault(entry.get("page"), []).append(entry["item"])
+
+    def release(self, page):
+        """Queues the deferred items of `page`, now that it is loaded. Returns how many there were."""
+        items = self.deferred.pop(page, [])
+        self.queue.extend(items)
+        return len(items)
+
+    def release_all(self):
+        """Queues every deferred item for a replay away from its page: without a DOM position, so nothing is hovered."""
+        for items in self.deferred.values():
+            self.queue.extend(items)
+        self.deferred = {}
+        self.queue = [dict(item, index=None) for item in self.queue]
+
+    def take(self):
+        """Empties the queue; returns its items and the delay to wait before replaying them."""
+        items, self.queue = self.queue, []
+        delay = self.backoff * max(self.attempts.get(item.get("href"), 0) for item in items) if items else 0
+        return items, delay
@@ -0,0 +1,133 @@
+import json
+import time
+import asyncio
+from html.parser import HTMLParser
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from timing import LatencyStats
+from run_log import log
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+HTTP_POOL_SIZE = 8
+WATCH_HOST = "netflix.com"  # Only title links on this host have a synopsis to fetch
+
+
+class DetailPageParser(HTMLParser):
+    """Collects <meta> name/property -> content pairs and the bodies of JSON-LD scripts."""
+
+    def __init__(self):
+        super().__init__()
+        self.meta = {}
+        self.json_ld = []
+        self._ld_chunks = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta":
+            key = attrs.get("name") or attrs.get("property")
+            if key and attrs.get("content") and key not in self.meta:
+                self.meta[key] = attrs["content"]
+        elif tag == "script" and attrs.get("type") == "application/ld+json":
+            self._ld_chunks = []
+
+    def handle_data(self, data):
+        if self._ld_chunks is not None:
+            self._ld_chunks.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "script" and self._ld_chunks is not None:
+            self.json_ld.append("".join(self._ld_chunks))
+            self._ld_chunks = None
+
+
+def find_json_ld_description(obj):
+    if isinstance(obj, dict):
+        if isinstance(obj.get("description"), str) and obj["description"].strip():
+            return obj["description"]
+        obj = list(obj.values())
+    if isinstance(obj, list):
+        for value in obj:
+            found = find_json_ld_description(value)
+            if found:
+                return found
+    return None
+
+
+def parse_description(html):
+    """Synopsis from server-rendered HTML: JSON-LD first, then og:description, then meta description."""
+    parser = DetailPageParser()
+    try:
+        parser.feed(html)
+    except Exception:
+        pass
+    for block in parser.json_ld:
+        try:
+            found = find_json_ld_description(json.loads(block))
+        except ValueError:
+            continue
+        if found:
+            return found.strip()
+    for key in ("og:description", "description", "twitter:description"):
+        if parser.meta.get(key, "").strip():
+            return parser.meta[key].strip()
+    return None
+
+
+def is_watch_url(url):
+    """Title links point at WATCH_HOST; anything else has no synopsis to fetch."""
+    return bool(url) and WATCH_HOST in url
+
+
+class DetailFetcher:
+    """
+    Tiered synopsis lookup: Tier 1 is a pooled plain-HTTP GET plus HTML parsing; only pages where
+    it finds nothing escalate to Tier 2, the Playwright `browser_fetch` (get_description).
+    Hit counts and latencies are kept per tier.
+    """
+
+    def __init__(self, browser_fetch, use_http=True, pool_size=HTTP_POOL_SIZE):
+        self.browser_fetch = browser_fetch
+        self.use_http = use_http
+        self.stats = LatencyStats("Detail tiers")
+        self.hits = {"http": 0, "browser": 0}
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch_http(self, detail_url):
+        try:
+            res = self.session.get(detail_url, timeout=15)
+            if res.status_code != 200:
+                return None
+            return parse_description(res.content.decode("utf-8", errors="replace"))
+        except Exception:
+            return None
+
+    async def fetch(self, browser_context, detail_url, page=None, waiter=None, policy=None):
+        if not is_watch_url(detail_url):
+            return "N/A"
+        if self.use_http:
+            t0 = time.perf_counter()
+            description = await asyncio.to_thread(self.fetch_http, detail_url)
+            self.stats.record("http hit" if description else "http miss", time.perf_counter() - t0)
+            if description:
+                self.hits["http"] += 1
+                return description
+        t0 = time.perf_counter()
+        description = await self.browser_fetch(browser_context, detail_url, page, waiter, policy)
+        self.stats.record("browser", time.perf_counter() - t0)
+        self.hits["browser"] += 1
+        return description
+
+    def close(self):
+        self.session.close()
+
+    def report(self):
+        if not any(self.hits.values()):
+            return
+        log(f"Detail tiers: {self.hits['http']} via HTTP, {self.hits['browser']} escalated to the browser")
+        self.stats.report()
@@ -0,0 +1,109 @@
+import os
+import json
+import zipfile
+import hashlib
+
+IMAGE_DIR = "images"
+EXPORT_CACHE_DIR = "export_cache"
+EXPORT_CACHE_KEEP = 3  # Archives kept around for repeat downloads
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+COPY_CHUNK = 1024 * 1024
+
+
+def export_manifest(image_dir=IMAGE_DIR):
+    """
+    (arcname, path, size, mtime_ns) for every file in the package. Layout:
+        Title_Page.jpg
+        images/<poster>.jpg ...
+    """
+    entries = []
+    if not os.path.isdir(image_dir):
+        return entries
+    for item in sorted(os.listdir(image_dir)):
+        if not item.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        path = os.path.join(image_dir, item)
+        if not os.path.isfile(path):
+            continue
+        st = os.stat(path)
+        arcname = item if item == "Title_Page.jpg" else f"images/{item}"
+        entries.append((arcname, path, st.st_size, st.st_mtime_ns))
+    return entries
+
+
+def manifest_hash(entries):
+    return hashlib.sha256(json.dumps([[e[0], e[2], e[3]] for e in entries]).encode("utf-8")).hexdigest()[:32]
+
+
+def cached_archive(entries, cache_dir=EXPORT_CACHE_DIR):
+    path = os.path.join(cache_dir, f"{manifest_hash(entries)}.zip")
+    return path if os.path.exists(path) else None
+
+
+class _StreamWriter:
+    """Write-only sink for ZipFile: buffers bytes for the response and tees them into the cache file."""
+
+    def __init__(self, tee):
+        self.tee = tee
+        self.chunks = []
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.tee.write(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Yields whatever has been written since the last drain (nothing if empty)."""
+        if self.chunks:
+            data = b"".join(self.chunks)
+            self.chunks = []
+            yield data
+
+
+def stream_archive(entries, cache_dir=EXPORT_CACHE_DIR):
+    """
+    Yields the ZIP straight from images/ (no staging copy). JPEG/PNG/WebP are stored, not deflated,
+    since they are already compressed. The bytes are also written to the manifest-keyed cache and
+    only published there once the archive is complete.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    final_path = os.path.join(cache_dir, f"{manifest_hash(entries)}.zip")
+    tmp_path = f"{final_path}.{os.getpid()}.{id(entries)}.part"
+    completed = False
+    try:
+        with open(tmp_path, "wb") as tee:
+            out = _StreamWriter(tee)
+            with zipfile.ZipFile(out, "w") as zf:
+                for arcname, path, _, _ in entries:
+                    compress = zipfile.ZIP_STORED if arcname.lower().endswith(IMAGE_EXTENSIONS) else zipfile.ZIP_DEFLATED
+                    info = zipfile.ZipInfo.from_file(path, arcname)
+                    info.compress_type = compress
+                    with open(path, "rb") as src, zf.open(info, "w") as dst:
+                        while True:
+                            chunk = src.read(COPY_CHUNK)
+                            if not chunk:
+                                break
+                            dst.write(chunk)
+                            yield from out.drain()
+                    yield from out.drain()
+            yield from out.drain()  # central directory
+        os.replace(tmp_path, final_path)
+        completed = True
+        prune_cache(cache_dir)
+    finally:
+        if not completed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def prune_cache(cache_dir=EXPORT_CACHE_DIR, keep=EXPORT_CACHE_KEEP):
+    archives = [os.path.join(cache_dir, f) for f in os.listdir(cache_dir) if f.endswith(".zip")]
+    archives.sort(key=os.path.getmtime, reverse=True)
+    for path in archives[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -12,6 +12,10 @@ const formatDateChinese = (dateStr) => {
   return `${month}月${day}日`;
 };
 
+// Client-side cap on rendered log lines (the server keeps its own bounded buffer)
+const MAX_LOG_LINES = 500;
+const FINISHED_STATES = ['completed', 'failed', 'cancelled', 'interrupted'];
+
 const App = () => {
   const [startDate, setStartDate] = useState('2026/02/09');
   const [endDate, setEndDate] = useState('2026/02/15');
@@ -30,22 +34,28 @@ const App = () => {
 
   useEffect(() => {
     if (status === 'running' && jobId) {
-      const interval = setInterval(async () => {
-        try {
-          const res = await fetch(`/api/status/${jobId}`);
-          const data = await res.json();
-          setLogs(data.logs || []);
-          setCount(data.count || 0);
-          if (data.status === 'completed' || data.status === 'failed') {
-            setStatus(data.status);
-            clearInterval(interval);
-            fetchResults();
-          }
-        } catch (err) {
-          console.error('Polling error:', err);
+      // Server pushes progress events; EventSource resumes from the last seq (Last-Event-ID) on reconnect
+      const source = new EventSource(`/api/events/${jobId}`);
+      source.onmessage = (e) => {
+        const event = JSON.parse(e.data);
+        if (event.type === 'log') {
+          setLogs(prev => [...prev, event.data.line].slice(-MAX_LOG_LINES));
+        } else if (event.type === 'item') {
+          setCount(event.data.index);
+        } else if (event.type === 'summary') {
+          setCount(event.data.total);
+        } else if (event.type === 'gap') {
+          setLogs(prev => [...prev, `… ${event.data.dropped} earlier lines skipped …`].slice(-MAX_LOG_LINES));
+        } else if (event.type === 'status' && FINISHED_STATES.includes(event.data.status)) {
+          setStatus(event.data.status === 'completed' ? 'completed' : 'failed');
+          source.close();
+          fetchResults();
         }
-      }, 2000);
-      return () => clearInterval(interval);
+      };
+      source.onerror = (err) => {
+        console.error('Event stream error:', err);
+      };
+      return () => source.close();
     }
   }, [status, jobId]);
 
@@ -58,7 +68,7 @@ const App = () => {
 
   const fetchResults = async () => {
     try {
-      const res = await fetch('/api/results');
+      const res = await fetch(`/api/results?job_id=${jobId}`);
       const data = await res.json();
       setResults(data);
     } catch (err) {
@@ -68,7 +78,7 @@ const App = () => {
 
   const handleDownload = async () => {
     try {
-      window.open('/api/download', '_blank');
+      window.open(`/api/download?job_id=${jobId}`, '_blank');
     } catch (err) {
       console.error('Download error:', err);
     }
@@ -93,6 +103,7 @@ const App = () => {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ 
+            job_id: jobId,
             start_date: startDate, 
             end_date: endDate,
             custom_prompt: customPrompt, // Backend needs to support this or we rely on backend logic?
@@ -102,15 +113,45 @@ const App = () => {
             // User asked for "results.length" which is available here in frontend.
             // So I will pass text "override_title" and "override_tags".
             override_title: dynamicTitle,
-            override_tags: STANDARD_TAGS
+            override_tags: STANDARD_TAGS,
+            stream: true
         })
       });
-      const data = await res.json();
-      if (data.note) {
-        setNoteContent(data.note);
-        setShowNoteModal(true);
-      } else {
-        console.error('Note generation failed:', data.error);
+      if (!(res.headers.get('content-type') || '').startsWith('text/event-stream')) {
+        // Errors and the "nothing scraped yet" answer still come back as plain JSON
+        const data = await res.json();
+        if (data.note) {
+          setNoteContent(data.note);
+          setShowNoteModal(true);
+        } else {
+          console.error('Note generation failed:', data.error);
+        }
+        return;
+      }
+
+      // Tokens stream in as SSE "delta" events; "done" carries the final cleaned note
+      setNoteContent('');
+      setShowNoteModal(true);
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split('\n\n');
+        buffer = frames.pop();
+        for (const frame of frames) {
+          if (!frame.startsWith('data: ')) continue;
+          const event = JSON.parse(frame.slice(6));
+          if (event.type === 'delta') {
+            setNoteContent(prev => prev + event.text);
+          } else if (event.type === 'done') {
+            setNoteContent(event.note);
+          } else if (event.type === 'error') {
+            console.error('Note generation failed:', event.error);
+          }
+        }
       }
     } catch (err) {
       console.error('Generate note error:', err);
@@ -132,19 +173,6 @@ const App = () => {
     setTitleImage(null);
     setGeneratingTitle(true);
 
-    // Trigger Title Generation in parallel
-    fetch('/api/generate_title', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ date_range: `${formatDateChinese(startDate)}～${formatDateChinese(endDate)}`, title: "收视冠军" })
-    })
-    .then(res => res.json())
-    .then(data => {
-        if (data.image_url) setTitleImage(data.image_url);
-    })
-    .catch(err => console.error("Title generation error:", err))
-    .finally(() => setGeneratingTitle(false));
-
     try {
       const res = await fetch('/api/scrape', {
         method: 'POST',
@@ -153,8 +181,22 @@ const App = () => {
       });
       const data = await res.json();
       setJobId(data.job_id);
+
+      // Title page goes into the new job's workspace, rendered while the scrape runs (or waits in the queue)
+      fetch('/api/generate_title', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ job_id: data.job_id, date_range: `${formatDateChinese(startDate)}～${formatDateChinese(endDate)}`, title: "收视冠军" })
+      })
+      .then(res => res.json())
+      .then(data => {
+          if (data.image_url) setTitleImage(data.image_url);
+      })
+      .catch(err => console.error("Title generation error:", err))
+      .finally(() => setGeneratingTitle(false));
     } catch (err) {
       setStatus('failed');
+      setGeneratingTitle(false);
       console.error('Start scrape error:', err);
     }
   };
@@ -350,7 +392,7 @@ const App = () => {
                             <>
                             <img 
                                 key={titleImage} // Force reload on change
-                                src={`/images/${titleImage}?t=${Date.now()}`} 
+                                src={`/jobs/${jobId}/images/${titleImage}?t=${Date.now()}`} 
                                 className="w-full h-full object-cover" 
                                 alt="Title Page" 
                             />
@@ -418,7 +460,7 @@ const App = () => {
                   >
                     <div className="aspect-[450/630] bg-white/5 rounded-2xl overflow-hidden border border-white/5 active:scale-95 transition-all card-scale shadow-2xl relative">
                        <img 
-                          src={`/images/${item["Poster Filename"]}`} 
+                          src={`/jobs/${jobId}/images/${item["Poster Filename"]}`} 
                           alt={item.Title}
                           className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-110 grayscale-[30%] group-hover:grayscale-0"
                           onError={(e) => { e.target.style.display = 'none'; }}
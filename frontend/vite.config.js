@@ -11,7 +11,7 @@ export default defineConfig({
         target: 'http://localhost:8000',
         changeOrigin: true,
       },
-      '/images': {
+      '/jobs': {
         target: 'http://localhost:8000',
         changeOrigin: true,
       },
@@ -0,0 +1,75 @@
+import json
+import asyncio
+import threading
+from collections import deque
+
+LOG_BUFFER_SIZE = 500  # Events kept per job; older ones are dropped and reported as a gap on resume
+STATUS_TAIL = 50  # Recent log lines included in /api/status
+
+
+class JobEvents:
+    """
+    Fixed-size ring buffer of a job's events, each with a monotonically increasing sequence number.
+
+    It is also the run_log sink for the job: log lines become "log" events and the scraper's
+    structured events ("item", "page", "stage", ...) are stored as-is. Subscribers resume from
+    a cursor (the last seq they saw) instead of re-downloading history.
+    Publishing is thread-safe; waiters are woken on the event loop the job was created on.
+    """
+
+    def __init__(self, maxlen=LOG_BUFFER_SIZE):
+        self.buffer = deque(maxlen=maxlen)
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.loop = asyncio.get_running_loop()
+        self.changed = asyncio.Event()
+        self.listeners = []
+
+    def publish(self, kind, data):
+        with self.lock:
+            self.seq += 1
+            event = {"seq": self.seq, "type": kind, "data": data}
+            self.buffer.append(event)
+        for listener in self.listeners:
+            listener(event)
+        self.loop.call_soon_threadsafe(self._notify)
+        return event
+
+    def _notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    # run_log sink interface
+    def log(self, line):
+        line = line.strip()
+        if line:
+            self.publish("log", {"line": line})
+
+    def event(self, kind, data):
+        self.publish(kind, data)
+
+    def since(self, cursor):
+        """Events after `cursor`, plus how many were already evicted from the ring in between."""
+        with self.lock:
+            events = [e for e in self.buffer if e["seq"] > cursor]
+            oldest = self.buffer[0]["seq"] if self.buffer else self.seq + 1
+        return events, max(0, oldest - cursor - 1)
+
+    def recent_logs(self, limit=STATUS_TAIL):
+        with self.lock:
+            lines = [e["data"]["line"] for e in self.buffer if e["type"] == "log"]
+        return lines[-limit:]
+
+    async def wait(self, cursor, timeout):
+        changed = self.changed
+        if self.seq > cursor:
+            return True
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+def format_sse(event):
+    return f"id: {event['seq']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
@@ -0,0 +1,179 @@
+import os
+import time
+import uuid
+import sqlite3
+import asyncio
+from collections import deque
+from job_events import JobEvents
+
+JOBS_DIR = "jobs"  # One workspace per job: jobs/<job_id>/{netflix_records.csv, images/}
+JOBS_DB = "jobs.db"
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+FINISHED_STATES = ("completed", "failed", "cancelled", "interrupted")
+
+# Columns persisted per job; events and the asyncio task only live in memory
+JOB_FIELDS = ("id", "status", "start_date", "end_date", "count", "workspace", "error",
+              "created_at", "started_at", "finished_at")
+
+
+class JobScheduler:
+    """
+    Runs scrape jobs with at most `max_concurrent` in flight; the rest wait in a FIFO queue.
+
+    Every job gets its own workspace directory, so parallel date ranges never share a CSV or an
+    images/ folder. Job metadata is kept in SQLite and reloaded on startup: jobs that were still
+    queued are queued again, jobs that were mid-run are marked "interrupted" and can be resumed.
+    `runner(job)` is the coroutine that does the work; it is cancelled when the job is.
+    """
+
+    def __init__(self, runner, max_concurrent=MAX_CONCURRENT_JOBS, root=JOBS_DIR, db_path=JOBS_DB):
+        self.runner = runner
+        self.max_concurrent = max(1, max_concurrent)
+        self.root = root
+        self.jobs = {}
+        self.queue = deque()
+        self.tasks = {}
+        self.stopping = False
+        os.makedirs(root, exist_ok=True)
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute(f"CREATE TABLE IF NOT EXISTS jobs ({', '.join(JOB_FIELDS)}, PRIMARY KEY (id))")
+        self.db.commit()
+
+    async def start(self):
+        """Reload persisted jobs (needs the event loop for their event buffers) and resume the queue."""
+        rows = self.db.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs ORDER BY created_at").fetchall()
+        for row in rows:
+            job = self._new_job(dict(zip(JOB_FIELDS, row)))
+            if job["status"] == "running":
+                self._set_status(job, "interrupted", error="Server stopped while the job was running")
+            elif job["status"] == "queued":
+                self.queue.append(job["id"])
+        if self.queue:
+            print(f"Job scheduler: re-queued {len(self.queue)} jobs from the previous run")
+        self._dispatch()
+
+    async def stop(self):
+        self.stopping = True
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.db.close()
+
+    def _new_job(self, fields):
+        job = dict(fields)
+        job["events"] = JobEvents()
+        job["metrics"] = {}  # Latest StageMetrics snapshot from the run (in memory only)
+        job["events"].listeners.append(lambda event: self._track_progress(job, event))
+        self.jobs[job["id"]] = job
+        return job
+
+    def submit(self, start_date=None, end_date=None):
+        job_id = str(uuid.uuid4())
+        workspace = os.path.join(self.root, job_id)
+        os.makedirs(os.path.join(workspace, "images"), exist_ok=True)
+        job = self._new_job({
+            "id": job_id,
+            "status": "queued",
+            "start_date": start_date,
+            "end_date": end_date,
+            "count": 0,
+            "workspace": workspace,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        })
+        self._save(job)
+        self.queue.append(job_id)
+        self._dispatch()
+        return job
+
+    def cancel(self, job_id):
+        """Drops a queued job or cancels a running one. False if the job is unknown or already done."""
+        job = self.jobs.get(job_id)
+        if not job or job["status"] in FINISHED_STATES:
+            return False
+        if job_id in self.queue:
+            self.queue.remove(job_id)
+            self._set_status(job, "cancelled")
+        elif job_id in self.tasks:
+            self.tasks[job_id].cancel()
+        return True
+
+    def resume(self, job_id):
+        """Queues an interrupted or failed job again; its runner continues from the job's checkpoint. False if it can't be."""
+        job = self.jobs.get(job_id)
+        if not job or job["status"] not in ("interrupted", "failed"):
+            return False
+        job["error"] = None
+        job["finished_at"] = None
+        self._set_status(job, "queued")
+        self.queue.append(job_id)
+        self._dispatch()
+        return True
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def latest(self):
+        """Most recently submitted job (what the UI means when it doesn't name one)."""
+        return max(self.jobs.values(), key=lambda job: job["created_at"], default=None)
+
+    def queue_position(self, job_id):
+        return self.queue.index(job_id) + 1 if job_id in self.queue else 0
+
+    def describe(self, job):
+        info = {field: job[field] for field in JOB_FIELDS}
+        info["queue_position"] = self.queue_position(job["id"])
+        return info
+
+    def _dispatch(self):
+        while not self.stopping and self.queue and len(self.tasks) < self.max_concurrent:
+            job = self.jobs[self.queue.popleft()]
+            job["started_at"] = time.time()
+            self._set_status(job, "running")
+            task = asyncio.create_task(self._run(job))
+            task.add_done_callback(lambda task, job=job: self._finished(job, task))
+            self.tasks[job["id"]] = task
+
+    async def _run(self, job):
+        try:
+            await self.runner(job)
+            self._set_status(job, "completed")
+        except Exception as e:
+            job["events"].log(f"Scrape failed: {e}")
+            self._set_status(job, "failed", error=str(e))
+
+    def _finished(self, job, task):
+        # A done callback rather than a finally: a task cancelled before its first step never runs _run
+        self.tasks.pop(job["id"], None)
+        if task.cancelled():
+            if self.stopping:
+                self._set_status(job, "interrupted", error="Server stopped while the job was running")
+            else:
+                job["events"].log("Job cancelled")
+                self._set_status(job, "cancelled")
+        self._dispatch()
+
+    def _set_status(self, job, status, error=None):
+        job["status"] = status
+        if error:
+            job["error"] = error
+        if status in FINISHED_STATES:
+            job["finished_at"] = time.time()
+        self._save(job)
+        job["events"].event("status", {"status": status})
+
+    def _track_progress(self, job, event):
+        if event["type"] == "item":
+            job["count"] = event["data"]["index"]
+        elif event["type"] == "summary":
+            job["count"] = event["data"]["total"]
+        elif event["type"] == "metrics":
+            job["metrics"] = event["data"]
+
+    def _save(self, job):
+        self.db.execute(f"INSERT OR REPLACE INTO jobs ({', '.join(JOB_FIELDS)}) VALUES ({', '.join('?' * len(JOB_FIELDS))})",
+                        [job[field] for field in JOB_FIELDS])
+        self.db.commit()
@@ -0,0 +1,67 @@
+import time
+import sqlite3
+from run_log import log
+
+CACHE_FILE = "metadata_cache.db"
+CACHE_TTL_DAYS = 30
+
+# Descriptions that mean the fetch failed; these are never cached so the next run retries them
+UNCACHEABLE_PREFIXES = ("Error:", "Description not found.", "N/A")
+
+
+class MetadataCache:
+    """
+    Persistent, cross-run cache of detail-page metadata keyed by Watch URL.
+
+    Synopses of released titles almost never change, so a fresh hit lets the scraper skip
+    the detail page entirely. `refresh=True` ignores existing entries but still stores new ones.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl_days=CACHE_TTL_DAYS, refresh=False):
+        self.ttl = ttl_days * 86400
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS metadata (
+                watch_url TEXT PRIMARY KEY,
+                title TEXT,
+                release_date TEXT,
+                description TEXT,
+                poster_url TEXT,
+                fetched_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, watch_url):
+        row = None
+        if watch_url and not self.refresh:
+            row = self.conn.execute(
+                "SELECT title, release_date, description, poster_url, fetched_at FROM metadata WHERE watch_url = ?",
+                (watch_url,)
+            ).fetchone()
+        if not row or time.time() - row[4] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"title": row[0], "release_date": row[1], "description": row[2], "poster_url": row[3], "fetched_at": row[4]}
+
+    def put(self, watch_url, title, release_date, description, poster_url):
+        if not watch_url or not description or description.startswith(UNCACHEABLE_PREFIXES):
+            return
+        self.conn.execute(
+            "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?)",
+            (watch_url, title, release_date, description, poster_url, time.time())
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        log(f"Metadata cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate)"
+            f"{' - refresh forced' if self.refresh else ''}")
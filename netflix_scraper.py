@@ -1,11 +1,24 @@
 import os
 import time
-import csv
 import re
 import argparse
+import asyncio
+import functools
 from datetime import datetime
-import requests
-from playwright.sync_api import sync_playwright
+from poster_downloader import PosterDownloader, DOWNLOAD_WORKERS
+from poster_store import PosterStore, STORE_MAX_MB
+from waits import Waiter
+from record_sink import RecordStream, CsvSink, open_sink, read_csv_records
+from metadata_cache import MetadataCache, CACHE_TTL_DAYS
+from route_policy import listing_policy, detail_policy
+from network_capture import ListingCapture
+from detail_fetcher import DetailFetcher, is_watch_url
+from verify_dimensions import verify_poster
+from browser_pool import open_context
+from timing import StageMetrics
+from watermark import Watermark, watermark_path, watch_id, merge_records
+from checkpoint import Checkpoint, RetryQueue, CHECKPOINT_DIR, ITEM_RETRIES
+from run_log import log, event, set_sink, EventFileSink
 
 # Configuration
 URL = "https://about.netflix.com/zh_cn/new-to-watch"
@@ -13,21 +26,57 @@ OUTPUT_DIR = "images"
 CSV_FILE = "netflix_records.csv"
 TARGET_WIDTH = 450
 HEADLESS = True
+DOWNLOAD_CONCURRENCY = DOWNLOAD_WORKERS
+DETAIL_CONCURRENCY = 1  # 1 = fetch synopses inline, N > 1 = pool of N detail pages
+EXTRACT_MODE = "dom"  # "network" builds records from the listing's JSON payloads, DOM as fallback
+VERIFY_POSTERS = "check"  # "off", "check" (header-only size check) or "fix" (resize/crop to 450x630)
+CONTAINER_SELECTOR = "div[class*='TitleContainer']"
+DESCRIPTION_SELECTORS = [
+    'div[data-uia="video-title-synopsis"]',
+    'div[data-uia="title-info-synopsis"]',
+    'div[data-uia="video-description"]',
+    '.p-b-1.p-t-1',
+    '.synopsis',
+    'meta[name="description"]'
+]
+# Signals that the detail page has rendered its synopsis (meta is always present, so it isn't one)
+SYNOPSIS_READY_SELECTOR = ", ".join(s for s in DESCRIPTION_SELECTORS if not s.startswith("meta"))
+# Cheap pre-pass for the pagination planner: date text, link and title of every card, no scrolling or hovering
+PAGE_SUMMARY_JS = """
+(selector) => Array.from(document.querySelectorAll(selector)).map(el => {
+    const link = el.querySelector("a[href*='/watch/']");
+    const match = el.innerText.match(/\\d{4}\\/\\d{1,2}\\/\\d{1,2}/);
+    return {
+        href: link ? link.getAttribute("href") : null,
+        date: match ? match[0] : null,
+        aria_label: link ? link.getAttribute("aria-label") : null,
+        link_text: link ? link.innerText : null,
+    };
+})
+"""
+# True once the first card on the listing links somewhere other than `href` (i.e. the next page rendered)
+LISTING_CHANGED_JS = """
+([selector, href]) => {
+    const link = document.querySelector(selector + " a[href*='/watch/']");
+    return !!link && link.getAttribute("href") !== href;
+}
+"""
 
-def download_image(url, filename):
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        res = requests.get(url, stream=True, headers=headers, timeout=15)
-        if res.status_code == 200:
-            with open(filename, 'wb') as f:
-                for chunk in res.iter_content(1024):
-                    f.write(chunk)
-            return True
-    except Exception as e:
-        print(f"Error downloading {url}: {e}")
-    return False
+# Reads every listing card in a single round trip instead of ~20 per-element IPC calls
+EXTRACT_CONTAINERS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector)).map((el, index) => {
+    const link = el.querySelector("a[href*='/watch/']");
+    const img = el.querySelector("img");
+    return {
+        index: index,
+        aria_label: link ? link.getAttribute("aria-label") : null,
+        link_text: link ? link.innerText : null,
+        href: link ? link.getAttribute("href") : null,
+        text: el.innerText,
+        src: img ? img.getAttribute("src") : null,
+    };
+})
+"""
 
 def get_high_res_url(url):
     if not url: return None
@@ -38,50 +87,103 @@ def get_high_res_url(url):
         return f"{base}?{'&'.join(new_params)}"
     return f"{url}?w={TARGET_WIDTH}"
 
-def get_description(browser_context, detail_url):
-    if not detail_url or "netflix.com" not in detail_url:
+async def new_page(browser_context, policy=None):
+    page = await browser_context.new_page()
+    if policy:
+        await policy.install(page)
+    return page
+
+async def get_description(browser_context, detail_url, page=None, waiter=None, policy=None):
+    if not is_watch_url(detail_url):
         return "N/A"
     
-    page = browser_context.new_page()
+    waiter = waiter or Waiter()
+    # Reuse the caller's page when given one (detail pool), otherwise open a throwaway page
+    own_page = page is None
+    if own_page:
+        page = await new_page(browser_context, policy)
     try:
-        page.goto(detail_url, wait_until="domcontentloaded", timeout=30000)
-        page.mouse.wheel(0, 300)
-        time.sleep(3)
-        
-        selectors = [
-            'div[data-uia="video-title-synopsis"]',
-            'div[data-uia="title-info-synopsis"]',
-            'div[data-uia="video-description"]',
-            '.p-b-1.p-t-1',
-            '.synopsis',
-            'meta[name="description"]'
-        ]
+        await page.goto(detail_url, wait_until="domcontentloaded", timeout=30000)
+        await page.mouse.wheel(0, 300)
+        await waiter.for_selector(page, SYNOPSIS_READY_SELECTOR, "detail synopsis", timeout=3)
         
-        for selector in selectors:
+        for selector in DESCRIPTION_SELECTORS:
             if selector.startswith("meta"):
-                element = page.query_selector(selector)
+                element = await page.query_selector(selector)
                 if element:
-                    content = element.get_attribute("content")
+                    content = await element.get_attribute("content")
                     if content: return content.strip()
             else:
-                element = page.query_selector(selector)
+                element = await page.query_selector(selector)
                 if element:
-                    text = element.inner_text()
+                    text = await element.inner_text()
                     if text: return text.strip()
                     
         return "Description not found."
     except Exception as e:
         return f"Error: {str(e)[:50]}"
     finally:
-        page.close()
+        if own_page:
+            await page.close()
 
-def save_records(records):
-    if not records: return
-    keys = ["Title", "Release Date", "Description", "Poster Filename", "Watch URL"]
-    with open(CSV_FILE, 'w', newline='', encoding='utf-8-sig') as f:
-        dict_writer = csv.DictWriter(f, fieldnames=keys)
-        dict_writer.writeheader()
-        dict_writer.writerows(records)
+async def detail_worker(browser_context, queue, stream, fetcher, waiter, cache, policy=None, metrics=None):
+    """
+    Pulls (index, watch_url, attempt) items off the queue and fills in that record using one reused page.
+    A fetch that raises goes back on the queue until it has had ITEM_RETRIES attempts; one cut short by
+    cancellation stays pending, so a checkpoint lists it for --resume.
+    """
+    page = None
+    try:
+        while True:
+            index, watch_url, attempt = await queue.get()
+            try:
+                # Opened per item as needed, so a page that can't be created is a failed attempt, not a dead worker
+                if page is None or page.is_closed():
+                    page = await new_page(browser_context, policy)
+                record = stream.records[index]
+                t0 = time.perf_counter()
+                record["Description"] = await fetcher.fetch(browser_context, watch_url, page, waiter, policy)
+                if metrics:
+                    metrics.record("detail", time.perf_counter() - t0)
+                cache_record(cache, record)
+                stream.mark_ready(index)
+            except Exception as e:
+                if attempt + 1 < ITEM_RETRIES:
+                    queue.put_nowait((index, watch_url, attempt + 1))
+                else:
+                    log(f"  Giving up on the synopsis of {watch_url}: {str(e)[:100]}")
+                    if metrics:
+                        metrics.count("details_failed")
+                    stream.mark_ready(index)
+            finally:
+                queue.task_done()
+    finally:
+        if page and not page.is_closed():
+            await page.close()
+
+async def join_detail_queue(queue, workers):
+    """Waits until every queued item is done; raises instead of hanging if all the workers exit first."""
+    joined = asyncio.ensure_future(queue.join())
+    try:
+        running = set(workers)
+        while running:
+            done, running = await asyncio.wait(running | {joined}, return_when=asyncio.FIRST_COMPLETED)
+            if joined in done:
+                return
+            running.discard(joined)
+        error = next((worker.exception() for worker in workers if not worker.cancelled() and worker.exception()), None)
+        raise RuntimeError(f"Detail workers exited with {queue.qsize()} descriptions still queued") from error
+    finally:
+        joined.cancel()
+
+def card_title(container):
+    """Display title of a listing card (DOM or payload), without the "watch on Netflix" wrapper and date."""
+    raw_title = container.get("aria_label") or container.get("link_text") or ""
+    return raw_title.replace("在 Netflix 上观看", "").strip(" ()→").split("202")[0].strip()
+
+def cache_record(cache, record):
+    cache.put(record["Watch URL"], record["Title"], record["Release Date"], record["Description"],
+              record.get("Poster URL"))
 
 def parse_date(date_str):
     try:
@@ -90,130 +192,509 @@ def parse_date(date_str):
     except:
         return None
 
-def scrape_netflix_data(start_date_str=None, end_date_str=None):
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
+async def extract_containers(page):
+    """Returns one plain dict per listing container (title, href, date text, image src)."""
+    return await page.evaluate(EXTRACT_CONTAINERS_JS, CONTAINER_SELECTOR)
+
+async def hover_for_src(page, index, waiter):
+    """Hovers a single container so its lazy image gets a src; only used when the bulk read found none."""
+    if index is None:
+        return None
+    container = page.locator(CONTAINER_SELECTOR).nth(index)
+    await container.hover()
+    img_el = container.locator("img").first
+    if await img_el.count():
+        await waiter.for_attribute(img_el, "src", "hover src", timeout=2)
+        return await img_el.get_attribute("src")
+    return None
+
+def plan_page(dates, start_date, end_date, ascending):
+    """
+    Decides what to do with a listing page from its card dates alone: "scrape", "skip" (entirely
+    outside the window, later pages may still match) or "stop" (entirely outside the window on the
+    side the listing is moving away from). The listing has been observed oldest-first, so
+    ascending=None is treated as ascending.
+    """
+    dates = [d for d in dates if d]
+    if not dates:
+        return "scrape"
+    ascending = ascending is not False
+    if end_date and min(dates) > end_date:
+        return "stop" if ascending else "skip"
+    if start_date and max(dates) < start_date:
+        return "skip" if ascending else "stop"
+    return "scrape"
+
+def resume_flags(checkpoint):
+    """CLI flags that continue `checkpoint`'s run from wherever its checkpoint lives."""
+    flags = f"--resume {checkpoint.run_id}"
+    if os.path.normpath(checkpoint.root) != CHECKPOINT_DIR:
+        flags += f" --checkpoint-dir {checkpoint.root}"
+    return flags
+
+async def scrape_netflix_data(start_date_str=None, end_date_str=None, detail_concurrency=DETAIL_CONCURRENCY,
+                              download_concurrency=DOWNLOAD_CONCURRENCY, extra_sinks=(),
+                              refresh=False, cache_ttl_days=CACHE_TTL_DAYS, store_max_mb=STORE_MAX_MB,
+                              block_resources=True, extract_mode=EXTRACT_MODE, http_tier=True,
+                              browser_pool=None, output_dir=OUTPUT_DIR, csv_file=CSV_FILE,
+                              verify_posters=VERIFY_POSTERS, incremental=False, run_id=None, resume=False,
+                              checkpoint_dir=CHECKPOINT_DIR, listing_url=None, resume_hint=None):
+    """
+    Scrapes the new-to-watch listing at `listing_url` (default URL, the zh_cn listing) into `csv_file`
+    and `output_dir`. `resume=True` continues the checkpointed run `run_id` with its original settings.
+    `resume_hint` is how the caller continues an interrupted run, for the log (default: the CLI flags).
+    """
+    if resume:
+        # The date window, destinations and modes are those of the interrupted run
+        checkpoint = Checkpoint.load(run_id, checkpoint_dir)
+        params = checkpoint.params
+        start_date_str, end_date_str = params["start"], params["end"]
+        output_dir, csv_file = params["output_dir"], params["csv_file"]
+        extract_mode, incremental = params["extract_mode"], params["incremental"]
+        listing_url = params.get("listing_url")
+    else:
+        checkpoint = Checkpoint(run_id, checkpoint_dir, params={
+            "start": start_date_str, "end": end_date_str, "output_dir": output_dir, "csv_file": csv_file,
+            "extract_mode": extract_mode, "incremental": incremental, "listing_url": listing_url,
+        })
+    listing_url = listing_url or URL
+    resume_hint = resume_hint or resume_flags(checkpoint)
+    log(f"Run {checkpoint.run_id} (checkpoint: {checkpoint.path})")
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
 
     start_date = parse_date(start_date_str) if start_date_str else None
     end_date = parse_date(end_date_str) if end_date_str else None
 
-    all_records = []
+    # Per-stage latencies and counters, published as "metrics" events after every page
+    metrics = StageMetrics()
+
+    # Records stream to the CSV (plus any extra JSONL/SQLite sinks) as they are accepted
+    stream = RecordStream([open_sink(csv_file)] + [open_sink(path) for path in extra_sinks], metrics=metrics)
+    all_records = stream.records
     processed_titles = set()
     max_pages = 5  # Safety limit to avoid infinite loops
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=HEADLESS)
-        context = browser.new_context(
+    # Resume: replay the checkpointed records; the ones still missing a synopsis are fetched again below
+    base_count = 0
+    resumed_pages = set()
+    if resume:
+        state = checkpoint.state
+        pending_details = set(state["pending_details"])
+        for index, record in enumerate(state["records"]):
+            stream.add(record, ready=index not in pending_details)
+        base_count = state["base_count"]
+        resumed_pages = checkpoint.completed_pages
+        processed_titles.update(record["Title"] for record in all_records[base_count:])
+        log(f"Resuming run {checkpoint.run_id}: pages {sorted(resumed_pages) or 'none'} done, "
+            f"{len(all_records) - base_count} records, {len(pending_details)} synopses and "
+            f"{len(state['pending_downloads'])} posters pending, {len(state['failed'])} failed items to retry.")
+
+    # Incremental: the existing dataset is carried over as-is and only new or changed titles are processed
+    watermark = None
+    if incremental:
+        existing = all_records[:base_count] if resume else (read_csv_records(csv_file) if os.path.exists(csv_file) else [])
+        watermark = Watermark(watermark_path(csv_file))
+        if watermark.reconcile(existing):
+            log(f"Watermark rebuilt from {len(existing)} records in {csv_file}.")
+        if not resume:
+            for record in existing:
+                stream.add(record)
+            base_count = len(all_records)
+        log(f"Incremental run: {len(watermark.seen)} known titles, newest {watermark.newest_date or 'n/a'}.")
+
+    # Items that raise are replayed a bounded number of times instead of being dropped
+    retries = RetryQueue()
+    if resume:
+        retries.requeue(checkpoint.state["failed"])
+
+    # Detail stage: inline (one page per title) or a pool of reusable pages fed by a queue
+    detail_queue = asyncio.Queue()
+    detail_workers = []
+    detail_time = 0.0
+    detail_started = None
+
+    waiter = Waiter()
+    cache = MetadataCache(ttl_days=cache_ttl_days, refresh=refresh)
+    # Abort fonts, media, trackers and imagery we never render (only the src attribute is read)
+    listing_routes = listing_policy() if block_resources else None
+    detail_routes = detail_policy() if block_resources else None
+    # Synopses come from plain HTTP when the server-rendered HTML has them, Chromium otherwise
+    fetcher = DetailFetcher(get_description, use_http=http_tier)
+
+    # Poster stage: the DOM loop only queues work, the downloader runs on its own pool
+    # and links posters out of the cross-job store, so warm runs make almost no requests
+    # and each poster's dimensions are checked from its header as it lands (optionally repaired)
+    verify = None if verify_posters == "off" else functools.partial(verify_poster, fix=verify_posters == "fix")
+    downloader = PosterDownloader(output_dir, workers=download_concurrency, store=PosterStore(max_mb=store_max_mb),
+                                  verify=verify, metrics=metrics)
+    if resume:
+        for url, path in checkpoint.state["pending_downloads"]:
+            downloader.submit(url, path)
+
+    def checkpoint_state():
+        return {
+            "base_count": base_count,
+            "records": all_records,
+            "pending_details": sorted(stream.pending),
+            "pending_downloads": downloader.pending(),
+            "failed": retries.failed,
+        }
+
+    page_num = 1
+    pages_skipped = 0
+    containers_skipped = 0
+    completed = False
+    try:
+        # Inside the API the context comes from the warm shared pool, from the CLI a one-off Chromium
+        async with open_context(
+            browser_pool,
+            headless=HEADLESS,
             user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             viewport={"width": 1440, "height": 900}
-        )
-        page = context.new_page()
-        
-        print(f"Opening: {URL}")
-        page.goto(URL, wait_until="domcontentloaded", timeout=60000)
-        time.sleep(10)
+        ) as context:
+            page = await new_page(context, listing_routes)
 
-        page_num = 1
-        
-        while True:
-            print(f"\n--- Scraping Page {page_num} ---")
-            
-            for i in range(10):
-                page.mouse.wheel(0, 800)
-                time.sleep(0.5)
-            time.sleep(2)
-            
-            containers = page.query_selector_all("div[class*='TitleContainer']")
-            print(f"Found {len(containers)} containers.")
-            
-            new_items_on_page = 0
-            
-            for container in containers:
-                try:
-                    container.hover()
-                    time.sleep(0.5)
-                    
-                    link_el = container.query_selector("a[href*='/watch/']")
-                    if not link_el: continue
-                    
-                    raw_title = link_el.get_attribute("aria-label") or link_el.inner_text()
-                    title = raw_title.replace("在 Netflix 上观看", "").strip(" ()→").split("202")[0].strip()
-                    
-                    if not title or title in processed_titles: continue
-                    
-                    watch_url = link_el.get_attribute("href")
-                    
-                    all_text = container.inner_text()
-                    date_match = re.search(r'\d{4}/\d{1,2}/\d{1,2}', all_text)
-                    date_str = date_match.group() if date_match else None
-                    
-                    # Filtering Logic: skip items outside the date range, but keep scanning
-                    if date_str:
-                        item_date = parse_date(date_str)
-                        if item_date:
-                            if end_date and item_date > end_date:
-                                print(f"  Skipping {title} ({date_str}) — newer than end date.")
-                                continue
-                            if start_date and item_date < start_date:
-                                print(f"  Skipping {title} ({date_str}) — older than start date.")
-                                continue
-                    
+            def queue_detail(index, watch_url):
+                # Queue the synopsis; the pool fills record["Description"] in place
+                nonlocal detail_workers, detail_started
+                if not detail_workers:
+                    detail_started = time.perf_counter()
+                    detail_workers = [
+                        asyncio.create_task(detail_worker(context, detail_queue, stream, fetcher, waiter, cache,
+                                                          detail_routes, metrics))
+                        for _ in range(max(detail_concurrency, 1))
+                    ]
+                detail_queue.put_nowait((index, watch_url, 0))
 
+            async def process_container(container):
+                """Turns one listing card into a record; False if it is skipped, raises if it fails."""
+                nonlocal detail_time
+                if not container["href"]: return False
 
-                    img_el = container.query_selector("img")
-                    src = img_el.get_attribute("src") if img_el else None
-                    
-                    print(f"  [{len(all_records)+1}] {title} ({date_str or 'Unknown'})")
-                    
-                    poster_filename = "N/A"
-                    if src:
-                        high_res_url = get_high_res_url(src)
-                        clean_title = "".join(x for x in title if x.isalnum() or x in " -_").strip()[:50]
-                        poster_filename = f"{clean_title}.jpg"
-                        target_path = os.path.join(OUTPUT_DIR, poster_filename)
-                        if not os.path.exists(target_path):
-                            download_image(high_res_url, target_path)
-                    
-                    description = get_description(context, watch_url)
-                    
-                    all_records.append({
-                        "Title": title,
-                        "Release Date": date_str or "Unknown",
-                        "Description": description,
-                        "Poster Filename": poster_filename,
-                        "Watch URL": watch_url
-                    })
-                    processed_titles.add(title)
-                    new_items_on_page += 1
-                    save_records(all_records)
-
-                except Exception as e:
-                    pass
-            
-
-
-            print(f"Page {page_num} completed. Collected {new_items_on_page} items.")
-
-            next_page_num = page_num + 1
-            next_btn = page.query_selector(f'button:has-text("{next_page_num}")')
-            if not next_btn:
-                next_btn = page.query_selector('button[aria-label="Next"], button[aria-label*="下一页"]')
-
-            if next_btn and page_num < max_pages:
-                print(f"Moving to Page {next_page_num}...")
-                next_btn.click()
-                page_num += 1
-                time.sleep(10)
-            else:
-                break
+                title = card_title(container)
+
+                if not title or title in processed_titles: return False
+
+                watch_url = container["href"]
+
+                all_text = container["text"] or ""
+                date_match = re.search(r'\d{4}/\d{1,2}/\d{1,2}', all_text)
+                date_str = date_match.group() if date_match else None
+
+                # Filtering Logic: skip items outside the date range, but keep scanning
+                if date_str:
+                    item_date = parse_date(date_str)
+                    if item_date:
+                        if end_date and item_date > end_date:
+                            log(f"  Skipping {title} ({date_str}) — newer than end date.")
+                            metrics.count("items_filtered")
+                            return False
+                        if start_date and item_date < start_date:
+                            log(f"  Skipping {title} ({date_str}) — older than start date.")
+                            metrics.count("items_filtered")
+                            return False
+
+                if watermark:
+                    title_id = watch_id(watch_url)
+                    if watermark.is_known(title_id, date_str, title):
+                        metrics.count("items_known")
+                        return False
+                    if title_id in watermark.seen:
+                        log(f"  Updating {title}: listing changed since the last run.")
+
+                cached = cache.get(watch_url)
+                src = container["src"] or (cached and cached["poster_url"])
+                if not src:
+                    with metrics.time("extraction"):
+                        src = await hover_for_src(page, container["index"], waiter)
+
+                log(f"  [{len(all_records)+1}] {title} ({date_str or 'Unknown'})")
+                event("item", index=len(all_records) + 1, title=title, release_date=date_str)
+
+                poster_filename = "N/A"
+                if src:
+                    high_res_url = get_high_res_url(src)
+                    clean_title = "".join(x for x in title if x.isalnum() or x in " -_").strip()[:50]
+                    poster_filename = f"{clean_title}.jpg"
+                    downloader.submit(high_res_url, os.path.join(output_dir, poster_filename))
+
+                record = {
+                    "Title": title,
+                    "Release Date": date_str or "Unknown",
+                    "Description": "",
+                    "Poster Filename": poster_filename,
+                    "Watch URL": watch_url,
+                    "Poster URL": src
+                }
+                if cached:
+                    # Known title: reuse the stored synopsis and skip the detail page entirely
+                    record["Description"] = cached["description"]
+                    metrics.count("detail_cache_hits")
+                    stream.add(record)
+                elif detail_concurrency > 1:
+                    queue_detail(stream.add(record, ready=False), watch_url)
+                else:
+                    t0 = time.perf_counter()
+                    record["Description"] = await fetcher.fetch(context, watch_url, waiter=waiter, policy=detail_routes)
+                    detail_time += time.perf_counter() - t0
+                    metrics.record("detail", time.perf_counter() - t0)
+                    cache_record(cache, record)
+                    stream.add(record)
+
+                processed_titles.add(title)
+                metrics.count("items_accepted")
+                return True
+
+            async def process_containers(containers):
+                accepted = 0
+                for container in containers:
+                    try:
+                        if await process_container(container):
+                            accepted += 1
+                    except Exception as e:
+                        if not retries.fail(container, e, page_num):
+                            metrics.count("items_failed")
+                            log(f"  Giving up on {container.get('href')} after {retries.attempts[container.get('href')]} "
+                                f"attempts: {str(e)[:100]}")
+                return accepted
+
+            async def replay_failed():
+                # Failed items go again while their page is still loaded, with a growing pause between rounds
+                accepted = 0
+                while retries.queue:
+                    items, delay = retries.take()
+                    metrics.count("items_retried", len(items))
+                    log(f"Retrying {len(items)} failed items in {delay:.1f}s...")
+                    await asyncio.sleep(delay)
+                    accepted += await process_containers(items)
+                return accepted
+
+            for index in sorted(stream.pending):
+                queue_detail(index, all_records[index]["Watch URL"])
+
+            # Network mode: record the listing JSON as it arrives instead of scrolling/hovering the DOM
+            capture = None
+            if extract_mode == "network":
+                capture = ListingCapture()
+                capture.attach(page)
+
+            log(f"Opening: {listing_url}")
+            with metrics.time("navigation"):
+                await page.goto(listing_url, wait_until="domcontentloaded", timeout=60000)
+                if not (capture and await waiter.for_condition(lambda: capture.has_page(1), "listing payload", timeout=5)):
+                    await waiter.for_stable_count(page, CONTAINER_SELECTOR, "initial listing", timeout=10)
+
+            listing_ascending = None
+
+            while True:
+                log(f"\n--- Scraping Page {page_num} ---")
+
+                payload = capture.containers_for(page_num) if capture else None
+                if capture and payload is None:
+                    log(f"No listing payload captured for page {page_num}, falling back to DOM extraction.")
+
+                # Read the page's date range before doing any per-item work
+                if payload is not None:
+                    summary = payload
+                else:
+                    with metrics.time("extraction"):
+                        summary = await page.evaluate(PAGE_SUMMARY_JS, CONTAINER_SELECTOR)
+                first_href = summary[0]["href"] if summary else None
+                page_dates = [parse_date(item["date"]) for item in summary if item["date"]]
+                page_dates = [d for d in page_dates if d]
+                if listing_ascending is None and page_dates and page_dates[0] != page_dates[-1]:
+                    listing_ascending = page_dates[0] < page_dates[-1]
+                plan = plan_page(page_dates, start_date, end_date, listing_ascending)
+                # Known territory: every title on the page is already in the dataset under the same name and date.
+                # New titles land at the end of an oldest-first listing, so only a newest-first one can stop here.
+                known_page = plan == "scrape" and watermark is not None and bool(summary) and all(
+                    watermark.is_known(watch_id(item["href"]), item["date"], card_title(item)) for item in summary)
+                if known_page:
+                    plan = "skip" if listing_ascending is not False else "stop"
+                resumed_page = plan == "scrape" and page_num in resumed_pages
+                if resumed_page:
+                    plan = "skip"
+
+                if plan == "scrape" and payload is not None:
+                    containers = payload
+                    log(f"Found {len(containers)} titles in the listing payload.")
+                elif plan == "scrape":
+                    with metrics.time("scroll"):
+                        await waiter.scroll_to_bottom(page, CONTAINER_SELECTOR)
+                    with metrics.time("extraction"):
+                        containers = await extract_containers(page)
+                    log(f"Found {len(containers)} containers.")
+                else:
+                    pages_skipped += 1
+                    metrics.count("pages_skipped")
+                    containers_skipped += len(summary)
+                    containers = []
+                    if known_page:
+                        metrics.count("pages_known")
+                        log(f"Skipping page {page_num}: all {len(summary)} titles are already in the dataset.")
+                    elif resumed_page:
+                        metrics.count("pages_resumed")
+                        log(f"Skipping page {page_num}: already completed before the checkpoint.")
+                    else:
+                        log(f"Skipping page {page_num}: all {len(summary)} titles "
+                            f"({min(page_dates):%Y/%m/%d} to {max(page_dates):%Y/%m/%d}) are outside the date range.")
+                    if plan == "stop":
+                        log("Reached titles already in the dataset, stopping pagination." if known_page
+                            else "Remaining pages are further outside the date range, stopping pagination.")
+                        break
+
+                new_items_on_page = await process_containers(containers)
+                if retries.release(page_num) and plan != "scrape" and payload is None:
+                    # Checkpointed failures from this page may need a hover, so its lazy cards must be there
+                    with metrics.time("scroll"):
+                        await waiter.scroll_to_bottom(page, CONTAINER_SELECTOR)
+                new_items_on_page += await replay_failed()
+
+                stream.sync()
+                checkpoint.complete_page(page_num, **checkpoint_state())
+                if plan == "scrape":
+                    metrics.count("pages_scraped")
+                log(f"Page {page_num} completed. Collected {new_items_on_page} items.")
+                event("page", page=page_num, items=new_items_on_page, skipped=plan != "scrape")
+                metrics.emit()
+
+                next_page_num = page_num + 1
+                next_btn = await page.query_selector(f'button:has-text("{next_page_num}")')
+                if not next_btn:
+                    next_btn = await page.query_selector('button[aria-label="Next"], button[aria-label*="下一页"]')
+
+                if next_btn and page_num < max_pages:
+                    log(f"Moving to Page {next_page_num}...")
+                    page_num += 1
+                    with metrics.time("pagination"):
+                        # The pagination buttons only work once the client bundle has hydrated the page
+                        await waiter.for_load_state(page, "load", "hydration", timeout=10)
+                        await next_btn.click()
+                        if capture and await waiter.for_condition(lambda: capture.has_page(page_num), "listing payload",
+                                                                  timeout=10):
+                            continue
+                        await waiter.for_function(page, LISTING_CHANGED_JS, [CONTAINER_SELECTOR, first_href],
+                                                  "pagination", timeout=10)
+                        await waiter.for_stable_count(page, CONTAINER_SELECTOR, "pagination settle", timeout=5)
+                else:
+                    break
+
+            # Checkpointed failures from pages this run never reached again
+            retries.release_all()
+            if retries.queue:
+                await replay_failed()
+
+            if detail_workers:
+                log(f"Waiting for {detail_queue.qsize()} queued descriptions...")
+                await join_detail_queue(detail_queue, detail_workers)
+                for worker in detail_workers:
+                    worker.cancel()
+                await asyncio.gather(*detail_workers, return_exceptions=True)
+                detail_time = time.perf_counter() - detail_started
+            completed = True
+    except BaseException:
+        # Crash, timeout or cancellation: keep everything up to here so --resume can pick it up
+        checkpoint.save("interrupted", **checkpoint_state())
+        log(f"Run {checkpoint.run_id} interrupted; resume with {resume_hint}")
+        raise
+    finally:
+        if not completed:
+            # Inside the API the process lives on: nothing of a failed or cancelled job may keep running
+            for worker in detail_workers:
+                worker.cancel()
+            if detail_workers:
+                await asyncio.gather(*detail_workers, return_exceptions=True)
+            downloader.abort()
+            stream.abort()
+            fetcher.close()
+            cache.close()
+
+    stream.close()
+
+    total = len(all_records)
+    if watermark:
+        merged = merge_records(all_records)
+        if len(merged) < len(all_records):
+            # Changed titles were appended again; put them back in their original rows
+            sink = CsvSink(csv_file)
+            for record in merged:
+                sink.write(record)
+            sink.close()
+        watermark.absorb(all_records[base_count:])
+        watermark.save()
+        total = len(merged)
+        updated_items = len(all_records) - len(merged)
+        new_items = len(merged) - base_count
+        log(f"Incremental merge: {new_items} new, {updated_items} updated, {total} titles in {csv_file} "
+            f"(newest {watermark.newest_date or 'n/a'})")
+        event("incremental", new=new_items, updated=updated_items, total=total,
+              newest_date=watermark.newest_date)
 
-        print(f"\nScraping Task Finished. Total: {len(all_records)}")
-        browser.close()
+    await asyncio.to_thread(downloader.close)
+    checkpoint.save("completed", **checkpoint_state())
+    if retries.failed:
+        log(f"{len(retries.failed)} items failed after {retries.max_attempts} attempts; "
+            f"they are kept in {checkpoint.path} and retried by {resume_hint}")
+    metrics.report()
+    metrics.emit()
+    waiter.report()
+    fetcher.report()
+    fetcher.close()
+    cache.report()
+    if capture:
+        capture.report()
+    for policy in (listing_routes, detail_routes):
+        if policy:
+            policy.report()
+    cache.close()
+    log(f"Detail stage: {len(all_records) - base_count} titles in {detail_time:.1f}s (concurrency {max(detail_concurrency, 1)})")
+    event("stage", name="detail", seconds=round(detail_time, 3))
+    log(f"Pagination planner: skipped {pages_skipped} pages ({containers_skipped} containers)")
+    log(f"\nScraping Task Finished. Total: {total}")
+    event("summary", total=total, pages=page_num, pages_skipped=pages_skipped)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Netflix Meta-Scraper with Date Filtering")
     parser.add_argument("--start", help="Start date (YYYY/M/D)", default=None)
     parser.add_argument("--end", help="End date (YYYY/M/D)", default=None)
+    parser.add_argument("--detail-concurrency", type=int, default=DETAIL_CONCURRENCY,
+                        help="Number of detail pages fetching synopses in parallel (1 = inline)")
+    parser.add_argument("--download-concurrency", type=int, default=DOWNLOAD_CONCURRENCY,
+                        help="Number of poster downloads in flight")
+    parser.add_argument("--sink", action="append", default=[],
+                        help="Also stream records to this file (.jsonl or .db/.sqlite); repeatable")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Ignore the metadata cache and re-fetch every detail page")
+    parser.add_argument("--cache-ttl", type=float, default=CACHE_TTL_DAYS,
+                        help="Days before a cached synopsis is considered stale")
+    parser.add_argument("--store-max-mb", type=float, default=STORE_MAX_MB,
+                        help="Size budget of the shared poster store before LRU eviction")
+    parser.add_argument("--no-block", action="store_true",
+                        help="Load every resource instead of aborting images, media, fonts and third-party requests")
+    parser.add_argument("--extract", choices=["dom", "network"], default=EXTRACT_MODE,
+                        help="Read titles from the rendered DOM or from the listing's JSON responses")
+    parser.add_argument("--no-http-tier", action="store_true",
+                        help="Always open detail pages in Chromium instead of trying plain HTTP first")
+    parser.add_argument("--verify-posters", choices=["off", "check", "fix"], default=VERIFY_POSTERS,
+                        help="Check each poster is 450x630 as it lands, or also resize/crop mismatches")
+    parser.add_argument("--events", default=None,
+                        help="Append structured progress/metrics events to this file as JSON lines")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only process titles not already in the CSV (or whose title/date changed) and merge them in")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None,
+                        help="Continue an interrupted run from its last checkpoint (same dates, files and mode)")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR,
+                        help="Where checkpoints are written and --resume looks for them (an API job's is jobs/<id>/checkpoints)")
     args = parser.parse_args()
     
-    scrape_netflix_data(args.start, args.end)
+    if args.resume and not os.path.exists(Checkpoint(args.resume, args.checkpoint_dir).path):
+        parser.error(f"no checkpoint for run '{args.resume}' in {args.checkpoint_dir}/")
+    if args.events:
+        set_sink(EventFileSink(args.events))
+    asyncio.run(scrape_netflix_data(args.start, args.end, args.detail_concurrency, args.download_concurrency,
+                                    args.sink, args.refresh, args.cache_ttl, args.store_max_mb,
+                                    not args.no_block, args.extract, not args.no_http_tier,
+                                    verify_posters=args.verify_posters, incremental=args.incremental,
+                                    run_id=args.resume, resume=bool(args.resume), checkpoint_dir=args.checkpoint_dir))
@@ -0,0 +1,105 @@
+import re
+import json
+from datetime import datetime, timezone
+from run_log import log
+
+NEXT_DATA_RE = re.compile(r'<script id="__NEXT_DATA__" type="application/json">(.*?)</script>', re.S)
+WATCH_URL = "https://www.netflix.com/watch/{}"
+
+
+def looks_like_title(item):
+    return isinstance(item, dict) and "videoID" in item and any(k in item for k in ("title1", "title2", "title"))
+
+
+def find_listing_results(obj):
+    """
+    Yields every {"data": [title, ...], "current": page?} object inside a payload. The listing
+    (see __NEXT_DATA__ in debug_page.html) nests it under props.pageProps.data.results.
+    """
+    if isinstance(obj, dict):
+        data = obj.get("data")
+        if isinstance(data, list) and data and all(looks_like_title(item) for item in data):
+            yield obj
+            return
+        for value in obj.values():
+            yield from find_listing_results(value)
+    elif isinstance(obj, list):
+        for value in obj:
+            yield from find_listing_results(value)
+
+
+def format_start_time(ms):
+    """Listing `startTime` (epoch ms, midnight PT = 08:00 UTC) -> the site's YYYY/M/D date text."""
+    if not isinstance(ms, (int, float)):
+        return None
+    d = datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+    return f"{d.year}/{d.month}/{d.day}"
+
+
+def payload_to_containers(items):
+    """Turns payload titles into the same dicts extract_containers() returns for DOM cards."""
+    containers = []
+    for item in items:
+        title = item.get("title1") or item.get("title2") or item.get("title") or ""
+        date = format_start_time(item.get("startTime"))
+        containers.append({
+            "index": None,  # no DOM card to hover
+            "aria_label": title,
+            "link_text": title,
+            "href": WATCH_URL.format(item["videoID"]),
+            "text": date or "",
+            "date": date,
+            "src": item.get("image"),
+        })
+    return containers
+
+
+class ListingCapture:
+    """
+    Records the listing's own JSON (the __NEXT_DATA__ document payload and later XHR/fetch pages)
+    via page.on("response"), keyed by the page number the payload reports.
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.responses = 0
+        self.matched = 0
+        self.next_key = 1
+
+    def attach(self, page):
+        page.on("response", self.on_response)
+
+    async def on_response(self, response):
+        request = response.request
+        if request.resource_type not in ("document", "xhr", "fetch"):
+            return
+        content_type = response.headers.get("content-type", "")
+        if "json" not in content_type and "html" not in content_type:
+            return
+        self.responses += 1
+        try:
+            body = await response.text()
+            if "html" in content_type:
+                match = NEXT_DATA_RE.search(body)
+                if not match:
+                    return
+                body = match.group(1)
+            payload = json.loads(body)
+        except Exception:
+            return
+        for results in find_listing_results(payload):
+            key = results.get("current")
+            if not isinstance(key, int):
+                key = self.next_key
+            self.next_key = key + 1
+            self.pages[key] = payload_to_containers(results["data"])
+            self.matched += 1
+
+    def has_page(self, page_num):
+        return page_num in self.pages
+
+    def containers_for(self, page_num):
+        return self.pages.get(page_num)
+
+    def report(self):
+        log(f"Network capture: {self.matched} listing payloads from {self.responses} JSON/HTML responses")
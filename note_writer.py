@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+from openai import AsyncOpenAI
+
+NOTE_MODEL = os.getenv("NOTE_MODEL", "gpt-4o-mini")
+NOTE_TIMEOUT = float(os.getenv("NOTE_TIMEOUT", "60"))  # Seconds per LLM request
+NOTE_CONCURRENCY = int(os.getenv("NOTE_CONCURRENCY", "2"))  # LLM calls in flight across all requests
+NOTE_CACHE_FILE = "note_cache.db"
+
+SYSTEM_PROMPT = "You are a helpful assistant specialized in social media content creation."
+
+
+def build_prompt(movies, override_title=None, override_tags=None):
+    movie_list_str = "\n".join(movies)
+    return f"""
+    You are a popular movie blogger on Xiaohongshu (Little Red Book).
+    Write an enthusiastic, emoji-filled post recommending these new Netflix movies.
+
+    Movies:
+    {movie_list_str}
+
+    Requirements:
+    1. Catchy Title with emojis. {f'MUST be exactly: "{override_title}"' if override_title else 'MUST be under 20 characters (including emojis).'}
+    2. Enthusiastic tone.
+    3. Brief mention of the movies.
+    4. Use tags like {override_tags if override_tags else '#Netflix #NewMovies #WeekendVibes #MovieRecommendation'}.
+    5. Language: Chinese (Simplified).
+    6. STRICTLY FORBIDDEN: Do NOT use markdown bold syntax (**text**) or any markdown formatting. Use plain text and emojis only.
+    7. Ensure the content is structured for mobile reading (short paragraphs).
+    """
+
+
+def clean_note(text):
+    # Post-processing to remove any markdown bold syntax if it still appears
+    return text.replace("**", "").replace("__", "")
+
+
+def note_cache_key(movies, override_title=None, override_tags=None):
+    payload = json.dumps([NOTE_MODEL, movies, override_title, override_tags], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class NoteWriter:
+    """
+    Generates Xiaohongshu notes with the async OpenAI client, streaming tokens as they arrive.
+
+    Finished notes are cached (SQLite) by movie list + override title/tags, so regenerating the
+    same week returns instantly without an LLM call. A semaphore caps concurrent LLM requests and
+    every request has a timeout; OPENAI_BASE_URL can point the client at a local stub server.
+    """
+
+    def __init__(self, api_key=None, base_url=None, timeout=NOTE_TIMEOUT, max_concurrent=NOTE_CONCURRENCY,
+                 cache_path=NOTE_CACHE_FILE):
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout)
+        self.slots = asyncio.Semaphore(max(1, max_concurrent))
+        self.conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS notes (key TEXT PRIMARY KEY, note TEXT, created_at REAL)")
+        self.conn.commit()
+
+    def cached(self, key):
+        row = self.conn.execute("SELECT note FROM notes WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def store(self, key, note):
+        self.conn.execute("INSERT OR REPLACE INTO notes VALUES (?, ?, ?)", (key, note, time.time()))
+        self.conn.commit()
+
+    async def stream(self, movies, override_title=None, override_tags=None):
+        """
+        Yields ("delta", text) chunks while the model writes, then ("done", note, cached) with the
+        cleaned full note. A cache hit yields only the final ("done", note, True).
+        """
+        key = note_cache_key(movies, override_title, override_tags)
+        note = self.cached(key)
+        if note is not None:
+            yield "done", note, True
+            return
+
+        parts = []
+        async with self.slots:
+            response = await self.client.chat.completions.create(
+                model=NOTE_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": build_prompt(movies, override_title, override_tags)}
+                ],
+                stream=True
+            )
+            async for chunk in response:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    parts.append(text)
+                    yield "delta", text
+
+        note = clean_note("".join(parts))
+        if note.strip():
+            self.store(key, note)
+        yield "done", note, False
+
+    async def generate(self, movies, override_title=None, override_tags=None):
+        async for item in self.stream(movies, override_title, override_tags):
+            if item[0] == "done":
+                return item[1]
+
+    async def close(self):
+        await self.client.close()
+        self.conn.close()
@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from timing import percentile
+from run_log import log, event
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+DOWNLOAD_WORKERS = 8
+CHUNK_SIZE = 256 * 1024  # Posters are ~50-150 KB, so most land in one or two writes
+VALIDATORS_FILE = ".poster_validators.json"  # ETag / Last-Modified per poster, kept next to the images
+
+
+class PosterDownloader:
+    """
+    Downloads posters on a bounded thread pool sharing one keep-alive connection pool.
+
+    The scrape loop only calls submit(); close() waits for the queue to drain, persists
+    the ETag/Last-Modified validators and prints throughput and per-file latency.
+    With a PosterStore, posters already in the store are linked into place without a request.
+    `verify(path)` (e.g. verify_dimensions.verify_poster) runs on each poster as soon as it lands;
+    with a StageMetrics each file's latency is recorded as the "poster" stage, counted by status.
+    Posters that are queued, in flight or failed are listed by pending() for checkpoints.
+    """
+
+    def __init__(self, output_dir, workers=DOWNLOAD_WORKERS, retries=3, backoff=0.5, store=None, verify=None,
+                 metrics=None):
+        self.output_dir = output_dir
+        self.store = store
+        self.verify = verify
+        self.metrics = metrics
+        self.verifications = []
+        self.validators_path = os.path.join(output_dir, VALIDATORS_FILE)
+        self.validators = self._load_validators()
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(
+            pool_connections=workers,
+            pool_maxsize=workers,
+            max_retries=Retry(total=retries, backoff_factor=backoff,
+                              status_forcelist=[429, 500, 502, 503, 504], allowed_methods=["GET"])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="poster")
+        self.futures = []
+        self.outstanding = {}  # target path -> url, until the poster is in place
+        self.results = []  # (filename, status, bytes, seconds)
+        self.lock = threading.Lock()
+        self.started = None
+
+    def _load_validators(self):
+        try:
+            with open(self.validators_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def submit(self, url, target_path):
+        if self.started is None:
+            self.started = time.perf_counter()
+        with self.lock:
+            self.outstanding[target_path] = url
+        # Run in the caller's context so log lines from the pool reach the same job log
+        future = self.executor.submit(contextvars.copy_context().run, self._fetch, url, target_path)
+        self.futures.append(future)
+        return future
+
+    def _fetch(self, url, target_path):
+        t0 = time.perf_counter()
+        status = self._download(url, target_path)
+        if self.metrics:
+            self.metrics.record("poster", time.perf_counter() - t0)
+            self.metrics.count(f"posters_{status}")
+        ok = status != "failed"
+        if ok:
+            with self.lock:
+                self.outstanding.pop(target_path, None)
+        if ok and self.verify:
+            result = self.verify(target_path)
+            with self.lock:
+                self.verifications.append(result)
+            if result["status"] != "pass":
+                log(f"Poster check {result['status']}: {result['file']} is {result['width']}x{result['height']}"
+                    f"{' - ' + result['error'] if result.get('error') else ''}")
+        return ok
+
+    def _download(self, url, target_path):
+        """Returns the outcome: store_hit, downloaded, not_modified or failed."""
+        filename = os.path.basename(target_path)
+        if self.store:
+            t0 = time.perf_counter()
+            blob = self.store.lookup(url)
+            if blob:
+                self.store.link(blob, target_path)
+                with self.lock:
+                    self.results.append((filename, "store_hit", 0, time.perf_counter() - t0))
+                return "store_hit"
+
+        headers = {}
+        cached = self.validators.get(filename)
+        if cached and cached.get("url") == url and os.path.exists(target_path):
+            if cached.get("etag"): headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"): headers["If-Modified-Since"] = cached["last_modified"]
+
+        t0 = time.perf_counter()
+        status, size = "failed", 0
+        try:
+            with self.session.get(url, headers=headers, stream=True, timeout=15) as res:
+                if res.status_code == 304:
+                    status = "not_modified"
+                elif res.status_code == 200:
+                    tmp_path = self.store.tmp_path(url) if self.store else target_path + ".part"
+                    with open(tmp_path, "wb", buffering=CHUNK_SIZE) as f:
+                        for chunk in res.iter_content(CHUNK_SIZE):
+                            f.write(chunk)
+                            size += len(chunk)
+                    if self.store:
+                        self.store.link(self.store.commit(url, tmp_path), target_path)
+                    else:
+                        os.replace(tmp_path, target_path)
+                    status = "downloaded"
+                    with self.lock:
+                        self.validators[filename] = {
+                            "url": url,
+                            "etag": res.headers.get("ETag"),
+                            "last_modified": res.headers.get("Last-Modified"),
+                        }
+                else:
+                    log(f"Error downloading {url}: HTTP {res.status_code}")
+        except Exception as e:
+            log(f"Error downloading {url}: {e}")
+
+        with self.lock:
+            self.results.append((filename, status, size, time.perf_counter() - t0))
+        return status
+
+    def pending(self):
+        """[[url, target path], ...] of posters not in place yet, in a JSON-friendly form."""
+        with self.lock:
+            return [[url, path] for path, url in self.outstanding.items()]
+
+    def close(self):
+        """Waits for queued downloads, saves validators and prints the download report."""
+        wait(self.futures)
+        self.executor.shutdown()
+        self.session.close()
+        try:
+            with open(self.validators_path, "w", encoding="utf-8") as f:
+                json.dump(self.validators, f, ensure_ascii=False)
+        except OSError as e:
+            log(f"Warning: could not save poster validators: {e}")
+        if self.store:
+            self.store.evict()
+        self.report()
+
+    def abort(self):
+        """Drops queued downloads and releases the pool and connections without waiting for them."""
+        for future in self.futures:
+            future.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def report(self):
+        if not self.results:
+            return
+        elapsed = time.perf_counter() - self.started
+        total_bytes = sum(r[2] for r in self.results)
+        latencies = [r[3] for r in self.results]
+        counts = {}
+        for r in self.results:
+            counts[r[1]] = counts.get(r[1], 0) + 1
+
+        log(f"\nPoster downloads: {len(self.results)} files in {elapsed:.1f}s "
+            f"({counts.get('downloaded', 0)} downloaded, {counts.get('store_hit', 0)} from store, "
+            f"{counts.get('not_modified', 0)} not modified, "
+            f"{counts.get('failed', 0)} failed)")
+        event("stage", name="posters", seconds=round(elapsed, 3), files=len(self.results), bytes=total_bytes)
+        log(f"  Throughput: {total_bytes / 1024:.0f} KB at {total_bytes / 1024 / max(elapsed, 1e-6):.0f} KB/s")
+        if self.verifications:
+            bad = sum(1 for v in self.verifications if v["status"] in ("fail", "error"))
+            fixed = sum(1 for v in self.verifications if v["status"] == "fixed")
+            log(f"  Dimension check: {len(self.verifications) - bad - fixed} ok, {fixed} fixed, {bad} mismatched")
+        log(f"  Latency: p50 {percentile(latencies, 50) * 1000:.0f}ms, "
+            f"p95 {percentile(latencies, 95) * 1000:.0f}ms, max {max(latencies) * 1000:.0f}ms")
+        for filename, status, size, seconds in sorted(self.results, key=lambda r: -r[3]):
+            log(f"    {seconds * 1000:6.0f}ms  {size / 1024:6.0f} KB  {status:<12} {filename}")
@@ -0,0 +1,102 @@
+import os
+import shutil
+import hashlib
+import tempfile
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from run_log import log
+
+STORE_DIR = "poster_store"
+STORE_MAX_MB = 500
+
+
+def normalize_url(url):
+    """Canonical form of a (high-res) poster URL: lower-cased host, sorted query parameters."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+
+class PosterStore:
+    """
+    Content-addressed poster blobs that survive between jobs.
+
+    Blobs are keyed by the SHA-256 of the normalized high-res URL and each job's images/ folder
+    is just a view of hardlinks (or symlinks across filesystems) into the store. A blob's mtime
+    is bumped on every use and evict() drops the least recently used blobs beyond max_mb.
+    """
+
+    def __init__(self, root=STORE_DIR, max_mb=STORE_MAX_MB):
+        self.root = root
+        self.max_bytes = max_mb * 1024 * 1024
+        os.makedirs(root, exist_ok=True)
+
+    def blob_path(self, url):
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.root, key[:2], key + ".jpg")
+
+    def lookup(self, url):
+        """Returns the blob path for `url` (marking it recently used) or None on a miss."""
+        path = self.blob_path(url)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)
+        return path
+
+    def tmp_path(self, url):
+        """A fresh temp file next to the blob; concurrent downloads of one URL each get their own."""
+        path = self.blob_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".",
+                                        suffix=".part")
+        os.close(fd)
+        return tmp_path
+
+    def commit(self, url, tmp_path):
+        """Moves a finished download into the store; if another download landed first, that blob is kept."""
+        path = self.blob_path(url)
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        except OSError:
+            os.replace(tmp_path, path)
+            return path
+        os.remove(tmp_path)
+        return path
+
+    def link(self, blob, target_path):
+        """Materializes `blob` at `target_path` in the job's view without copying bytes."""
+        if os.path.lexists(target_path):
+            os.remove(target_path)
+        try:
+            os.link(blob, target_path)
+        except OSError:
+            try:
+                os.symlink(os.path.abspath(blob), target_path)
+            except OSError:
+                shutil.copy2(blob, target_path)
+
+    def evict(self):
+        blobs = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                blobs.append((st.st_mtime, st.st_size, path))
+        total = sum(b[1] for b in blobs)
+        evicted = 0
+        for _, size, path in sorted(blobs):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        if evicted:
+            log(f"Poster store: evicted {evicted} blobs, {total / 1024 / 1024:.0f} MB kept")
+        return evicted
@@ -0,0 +1,163 @@
+import os
+import csv
+import json
+import time
+import sqlite3
+
+RECORD_FIELDS = ["Title", "Release Date", "Description", "Poster Filename", "Watch URL"]
+PARTIAL_SUFFIX = ".part"
+
+
+class CsvSink:
+    """
+    Streams records into `<path>.part` (header once, one appended row per record) and renames it
+    over `path` on close, so readers never see a torn file and a killed run leaves the old CSV intact.
+    """
+
+    def __init__(self, path, fields=RECORD_FIELDS):
+        self.path = path
+        self.tmp_path = path + PARTIAL_SUFFIX
+        self.file = open(self.tmp_path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.DictWriter(self.file, fieldnames=fields, extrasaction="ignore")
+        self.writer.writeheader()
+        self.file.flush()
+
+    def write(self, record):
+        self.writer.writerow(record)
+        self.file.flush()  # whole rows become visible to /api/results right away
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.sync()
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """Releases the file but leaves `path` as it was; what was written stays in the .part file."""
+        self.file.close()
+
+
+class JsonlSink(CsvSink):
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + PARTIAL_SUFFIX
+        self.file = open(self.tmp_path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self.file.write(json.dumps({k: record.get(k) for k in RECORD_FIELDS}, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+
+class SqliteSink:
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + PARTIAL_SUFFIX
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self.conn = sqlite3.connect(self.tmp_path)
+        columns = ", ".join(f'"{field}" TEXT' for field in RECORD_FIELDS)
+        self.conn.execute(f"CREATE TABLE records (id INTEGER PRIMARY KEY, {columns})")
+
+    def write(self, record):
+        placeholders = ", ".join("?" for _ in RECORD_FIELDS)
+        columns = ", ".join(f'"{field}"' for field in RECORD_FIELDS)
+        self.conn.execute(f"INSERT INTO records ({columns}) VALUES ({placeholders})",
+                          [record.get(field) for field in RECORD_FIELDS])
+
+    def sync(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+SINKS = {".csv": CsvSink, ".jsonl": JsonlSink, ".db": SqliteSink, ".sqlite": SqliteSink}
+
+
+def open_sink(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SINKS:
+        raise ValueError(f"Unsupported record sink '{path}' (expected one of {', '.join(SINKS)})")
+    return SINKS[ext](path)
+
+
+class RecordStream:
+    """
+    Fans records out to one or more sinks in listing order.
+
+    Records can be added before they are complete (e.g. the synopsis is still being fetched by the
+    detail pool); they are written once every earlier record is ready too.
+    Writes and syncs are timed as the "csv_write" stage when given a StageMetrics.
+    """
+
+    def __init__(self, sinks, metrics=None):
+        self.sinks = sinks
+        self.metrics = metrics
+        self.records = []
+        self.pending = set()
+        self.written = 0
+
+    def add(self, record, ready=True):
+        self.records.append(record)
+        index = len(self.records) - 1
+        if not ready:
+            self.pending.add(index)
+        self._drain()
+        return index
+
+    def mark_ready(self, index):
+        self.pending.discard(index)
+        self._drain()
+
+    def _drain(self):
+        while self.written < len(self.records) and self.written not in self.pending:
+            t0 = time.perf_counter()
+            for sink in self.sinks:
+                sink.write(self.records[self.written])
+            self.written += 1
+            if self.metrics:
+                self.metrics.record("csv_write", time.perf_counter() - t0)
+
+    def sync(self):
+        t0 = time.perf_counter()
+        for sink in self.sinks:
+            sink.sync()
+        if self.metrics:
+            self.metrics.record("csv_write", time.perf_counter() - t0)
+
+    def close(self):
+        self.pending.clear()
+        self._drain()
+        for sink in self.sinks:
+            sink.close()
+
+    def abort(self):
+        """For a run that failed or was cancelled: closes every sink without publishing it."""
+        for sink in self.sinks:
+            sink.abort()
+
+
+def read_csv_records(path, since=0):
+    """
+    Reads rows from a finished CSV, or from its `.part` file while a scrape is still streaming.
+    A trailing row without its newline is still being written and is left for the next read.
+    """
+    if not os.path.exists(path):
+        path = path + PARTIAL_SUFFIX
+        if not os.path.exists(path):
+            return []
+    with open(path, mode="r", encoding="utf-8-sig", newline="") as f:
+        content = f.read()
+    if content and not content.endswith("\n"):
+        content = content[:content.rfind("\n") + 1]
+    rows = list(csv.DictReader(content.splitlines(keepends=True)))
+    return rows[since:]
@@ -0,0 +1,92 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from record_sink import read_csv_records, PARTIAL_SUFFIX
+
+RESULTS_CACHE_FILES = 16  # Parsed CSVs kept in memory (one per job workspace)
+
+
+def parse_release_date(value):
+    try:
+        return datetime.strptime(value.strip(), "%Y/%m/%d")
+    except (AttributeError, ValueError):
+        return None
+
+
+class ResultsReader:
+    """
+    Shared, cached reader for the records CSV of a job.
+
+    Parsed rows stay in memory per path and are re-read only when the file's mtime or size changes
+    (or the streaming `.part` file is renamed into place), so repeated polls and note generation
+    don't re-parse the whole CSV. Queries filter, page and project the cached rows, and carry an
+    ETag derived from the file version plus the query, so an unchanged result set can return 304.
+    """
+
+    def __init__(self, max_files=RESULTS_CACHE_FILES):
+        self.max_files = max_files
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    @staticmethod
+    def _version(path):
+        for candidate in (path, path + PARTIAL_SUFFIX):
+            try:
+                st = os.stat(candidate)
+            except FileNotFoundError:
+                continue
+            return candidate, st.st_mtime_ns, st.st_size
+        return None
+
+    def load(self, path):
+        """[(release date, row), ...] for the CSV at `path`, and the file version they came from."""
+        version = self._version(path)
+        if version is None:
+            return [], None
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and entry[0] == version:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1], version
+        rows = [(parse_release_date(row.get("Release Date")), row) for row in read_csv_records(path)]
+        with self.lock:
+            self.entries[path] = (version, rows)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_files:
+                self.entries.popitem(last=False)
+            self.loads += 1
+        return rows, version
+
+    def query(self, path, offset=0, limit=None, start_date=None, end_date=None, title=None, fields=None):
+        """
+        Returns (rows, total, etag). `total` counts the filtered rows before paging; dates are
+        inclusive YYYY/M/D bounds on Release Date, `title` is a case-insensitive substring and
+        `fields` limits each row to those columns. etag is None when there is no file yet.
+        """
+        rows, version = self.load(path)
+        start = parse_release_date(start_date) if start_date else None
+        end = parse_release_date(end_date) if end_date else None
+        needle = title.casefold() if title else None
+
+        matched = [
+            row for date, row in rows
+            if (not start or (date and date >= start))
+            and (not end or (date and date <= end))
+            and (not needle or needle in (row.get("Title") or "").casefold())
+        ]
+        total = len(matched)
+        offset = max(offset, 0)
+        page = matched[offset:offset + limit if limit is not None else None]
+        if fields:
+            page = [{field: row.get(field) for field in fields} for row in page]
+
+        etag = None
+        if version is not None:
+            key = repr((version, offset, limit, start_date, end_date, title, fields))
+            etag = f'W/"{hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]}"'
+        return page, total, etag
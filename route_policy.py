@@ -0,0 +1,73 @@
+from urllib.parse import urlsplit
+from run_log import log
+
+# Only hosts the scraper actually needs; analytics, tag managers, consent and captcha scripts are dropped
+NETFLIX_DOMAINS = ("netflix.com", "nflxext.com", "nflximg.net", "nflxso.net", "nflxvideo.net")
+
+# Rough transfer sizes per resource type, used to estimate what the aborted requests would have cost
+TYPICAL_BYTES = {
+    "image": 80_000,
+    "media": 1_500_000,
+    "font": 40_000,
+    "stylesheet": 30_000,
+    "script": 60_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "other": 5_000,
+}
+
+
+class RoutePolicy:
+    """
+    Aborts requests by resource type, and by host when an allowlist is set, on the pages it is
+    installed on. Counts what it blocked so the run can report requests and (estimated) bytes saved.
+    """
+
+    def __init__(self, name, blocked_types=(), allowed_domains=None):
+        self.name = name
+        self.blocked_types = set(blocked_types)
+        self.allowed_domains = tuple(allowed_domains) if allowed_domains else None
+        self.allowed = 0
+        self.blocked = {}
+
+    def should_block(self, resource_type, url):
+        if resource_type == "document":
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        if self.allowed_domains:
+            host = urlsplit(url).hostname or ""
+            return not any(host == d or host.endswith("." + d) for d in self.allowed_domains)
+        return False
+
+    async def handle(self, route):
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked[request.resource_type] = self.blocked.get(request.resource_type, 0) + 1
+            await route.abort()
+        else:
+            self.allowed += 1
+            await route.continue_()
+
+    async def install(self, page):
+        await page.route("**/*", self.handle)
+        return page
+
+    def report(self):
+        total = sum(self.blocked.values())
+        if not total and not self.allowed:
+            return
+        saved = sum(TYPICAL_BYTES.get(kind, TYPICAL_BYTES["other"]) * n for kind, n in self.blocked.items())
+        breakdown = ", ".join(f"{kind} {n}" for kind, n in sorted(self.blocked.items()))
+        log(f"Request blocking ({self.name}): {total} of {total + self.allowed} requests aborted, "
+            f"~{saved / 1024 / 1024:.1f} MB saved{f' ({breakdown})' if breakdown else ''}")
+
+
+def listing_policy():
+    # Images stay blocked: only the src attribute is read, posters are downloaded separately
+    return RoutePolicy("listing", blocked_types={"image", "media", "font"}, allowed_domains=NETFLIX_DOMAINS)
+
+
+def detail_policy():
+    # Detail pages are only read for their synopsis text
+    return RoutePolicy("detail", blocked_types={"image", "media", "font", "stylesheet"}, allowed_domains=NETFLIX_DOMAINS)
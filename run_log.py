@@ -0,0 +1,49 @@
+import json
+import contextvars
+
+# Where log() lines and event() records go for the current run; None means stdout (events are
+# dropped). Set per job when the scraper runs inside the API process, and inherited by every
+# task/thread the run spawns from that context. A sink has .log(line) and .event(kind, data).
+_sink = contextvars.ContextVar("run_log_sink", default=None)
+
+
+def log(*args, sep=" "):
+    message = sep.join(str(a) for a in args)
+    sink = _sink.get()
+    if sink is None:
+        print(message, flush=True)
+        return
+    for line in message.splitlines():
+        sink.log(line)
+
+
+def event(kind, **data):
+    """Structured progress event (item accepted, page done, stage timing, ...)."""
+    sink = _sink.get()
+    if sink is not None:
+        sink.event(kind, data)
+
+
+def set_sink(sink):
+    return _sink.set(sink)
+
+
+def reset_sink(token):
+    _sink.reset(token)
+
+
+class EventFileSink:
+    """Prints log lines as usual and appends every structured event to `path` as one JSON line."""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def log(self, line):
+        print(line, flush=True)
+
+    def event(self, kind, data):
+        self.file.write(json.dumps({"type": kind, "data": data}, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,468 @@
+import io
+import os
+import re
+import sys
+import json
+import time
+import html
+import zlib
+import asyncio
+import argparse
+import tempfile
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from PIL import Image, ImageDraw
+import netflix_scraper
+import network_capture
+import detail_fetcher
+import route_policy
+import run_log
+from network_capture import NEXT_DATA_RE, format_start_time
+
+# Usage: python scrape_benchmark.py [--scenario dom-cold ...] [--latency-ms 20] [--save-baseline]
+#
+# Runs scrape_netflix_data end to end against a local replay of the listing instead of Netflix:
+# page 1 is the recorded debug_page.html, later pages/detail pages/posters are synthesized from it.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RECORDING = os.path.join(SCRIPT_DIR, "debug_page.html")
+BASELINES_FILE = os.path.join(SCRIPT_DIR, "benchmark_baselines.json")
+LISTING_PATH = "/zh_cn/new-to-watch"
+LATENCY_MS = 20  # Added to every replayed response so the run isn't purely CPU-bound
+REGRESSION_TOLERANCE = 0.25  # A metric this much worse than its baseline fails the run
+POSTER_SIZE = (450, 630)
+DAY_MS = 86_400_000
+
+SCENARIOS = {
+    "dom-cold": {"extract_mode": "dom"},
+    "dom-warm": {"extract_mode": "dom", "warm": True},
+    "network-cold": {"extract_mode": "network"},
+    "detail-pool-cold": {"extract_mode": "dom", "detail_concurrency": 4},
+}
+
+# (metric, True if higher is better) compared against the baseline
+BASELINE_METRICS = [("wall_s", False), ("items_per_s", True), ("pages_per_s", True), ("peak_rss_mb", False)]
+
+CARD_RE = re.compile(r'<div tabindex="0" class="[^"]*TitleContainer[^"]*">')
+
+# Stands in for the site's client bundle: pagination buttons fetch the page's JSON from the
+# Next.js data route and re-render the grid from the recorded card markup
+PAGINATION_JS = """
+<script>
+(() => {
+  const TEMPLATE = %(template)s, DATA_URL = %(data_url)s, WATCH_URL = %(watch_url)s, TOTAL = %(total)d;
+  const esc = (s) => String(s).replace(/[&<>"]/g, (c) => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})[c]);
+  const day = (ms) => { const d = new Date(ms); return `${d.getUTCFullYear()}/${d.getUTCMonth() + 1}/${d.getUTCDate()}`; };
+  let current = 1;
+  document.addEventListener("click", async (e) => {
+    const button = e.target.closest("button[class*='PaginationPageNumber']");
+    if (!button) return;
+    const target = button.className.includes("PaginationArrow") ? current + 1 : parseInt(button.innerText, 10);
+    if (!target || target === current || target > TOTAL) return;
+    const res = await fetch(`${DATA_URL}?page=${target}`);
+    const results = (await res.json()).pageProps.data.results;
+    document.querySelector("[class*='TitleContainer']").parentElement.innerHTML = results.data.map((item) => {
+      const title = esc(item.title1);
+      return TEMPLATE.replaceAll("{{title}}", title).replaceAll("{{date}}", day(item.startTime))
+        .replaceAll("{{src}}", esc(item.image)).replaceAll("{{href}}", WATCH_URL + item.videoID);
+    }).join("");
+    current = results.current;
+    document.querySelectorAll("button[class*='PaginationPageNumber']").forEach((b) => {
+      if (!b.className.includes("PaginationArrow")) b.setAttribute("aria-current", String(b.innerText.trim() === String(current)));
+    });
+    // No next arrow on the last page, so a run ends there instead of waiting on a page that never comes
+    if (current >= TOTAL) document.querySelectorAll("button[class*='PaginationArrow']").forEach((b) => b.remove());
+  });
+})();
+</script>
+"""
+
+
+class ReplayFixture:
+    """
+    The replayed site, derived from the recorded listing page. Page 1 is served as recorded (minus
+    every external script/stylesheet, with links and poster URLs pointing at the local server);
+    pages 2..totalPages reuse the recorded titles shifted later in time, like the live listing.
+    """
+
+    def __init__(self, recording=RECORDING):
+        with open(recording, encoding="utf-8") as f:
+            self.recorded = f.read()
+        self.next_data = json.loads(NEXT_DATA_RE.search(self.recorded).group(1))
+        results = self.next_data["props"]["pageProps"]["data"]["results"]
+        self.build_id = self.next_data.get("buildId", "replay")
+        self.per_page = results.get("perPage") or len(results["data"])
+        self.total_pages = results.get("totalPages") or 1
+        total_items = results.get("totalItems") or len(results["data"])
+
+        recorded_items = results["data"]
+        times = [item["startTime"] for item in recorded_items]
+        span = (max(times) - min(times)) + DAY_MS
+        self.pages = {1: recorded_items}
+        for page in range(2, self.total_pages + 1):
+            count = min(self.per_page, total_items - (page - 1) * self.per_page)
+            self.pages[page] = [
+                dict(item,
+                     videoID=item["videoID"] + page * 10_000_000,
+                     title1=f"{item['title1']} · 第{page}页",
+                     title2=f"{item['title2']} · 第{page}页",
+                     startTime=item["startTime"] + span * (page - 1))
+                for item in recorded_items[:count]
+            ]
+        self.titles = {item["videoID"]: item["title1"] for items in self.pages.values() for item in items}
+        self.image_ids = {item["image"]: item["videoID"] for item in recorded_items}
+        self.posters = {}
+        self.lock = threading.Lock()
+
+    @property
+    def total_items(self):
+        return sum(len(items) for items in self.pages.values())
+
+    def data_path(self):
+        return f"/_next/data/{self.build_id}{LISTING_PATH}.json"
+
+    def page_results(self, page, base):
+        results = dict(self.next_data["props"]["pageProps"]["data"]["results"], current=page)
+        results["data"] = [dict(item, image=f"{base}/posters/{item['videoID']}.jpg") for item in self.pages[page]]
+        return results
+
+    def card_template(self):
+        """The first recorded card with its title/date/link/poster swapped for placeholders."""
+        starts = [m.start() for m in CARD_RE.finditer(self.recorded)]
+        card = self.recorded[starts[0]:starts[1]]
+        first = self.pages[1][0]
+        title = html.escape(first["title1"], quote=True)
+        card = card.replace(f'src="{first["image"]}"', 'src="{{src}}"')
+        card = re.sub(r'href="[^"]*/watch/\d+"', 'href="{{href}}"', card)
+        card = card.replace(format_start_time(first["startTime"]), "{{date}}")
+        return card.replace(title, "{{title}}")
+
+    def listing_html(self, base):
+        page = self.recorded
+        # Offline: drop every script except the page data, and all stylesheets/iframes/CSS images
+        page = re.sub(r'<script(?![^>]*id="__NEXT_DATA__")[^>]*>.*?</script>', "", page, flags=re.S)
+        page = re.sub(r"<link[^>]*>", "", page)
+        page = re.sub(r"<iframe.*?</iframe>", "", page, flags=re.S)
+        page = re.sub(r"url\((&quot;|\"|')?https?://[^)]*\)", "none", page)
+
+        page = re.sub(r'https://www\.netflix\.com/watch/', f"{base}/watch/", page)
+        page = re.sub(r'src="(https?://[^"]+)"',
+                      lambda m: f'src="{base}/posters/{self.image_ids[m.group(1)]}.jpg"' if m.group(1) in self.image_ids
+                      else 'src="data:,"', page)
+
+        next_data = dict(self.next_data)
+        next_data["props"] = {"pageProps": dict(self.next_data["props"]["pageProps"])}
+        next_data["props"]["pageProps"]["data"] = dict(self.next_data["props"]["pageProps"]["data"],
+                                                       results=self.page_results(1, base))
+        page = NEXT_DATA_RE.sub(lambda m: m.group(0).replace(m.group(1), json.dumps(next_data, ensure_ascii=False)), page)
+
+        script = PAGINATION_JS % {
+            "template": json.dumps(self.card_template(), ensure_ascii=False),
+            "data_url": json.dumps(base + self.data_path()),
+            "watch_url": json.dumps(f"{base}/watch/"),
+            "total": self.total_pages,
+        }
+        return page.replace("</body>", script + "</body>")
+
+    def detail_html(self, video_id):
+        title = self.titles.get(video_id)
+        if title is None:
+            return None
+        synopsis = html.escape(f"{title}：离线回放用的剧情简介，用于基准测试。")
+        ld = json.dumps({"@type": "Movie", "name": title, "description": f"{title}：离线回放用的剧情简介，用于基准测试。"},
+                        ensure_ascii=False)
+        return (f'<!DOCTYPE html><html><head><title>{html.escape(title)}</title>'
+                f'<meta property="og:description" content="{synopsis}">'
+                f'<script type="application/ld+json">{ld}</script></head>'
+                f'<body><div data-uia="video-title-synopsis">{synopsis}</div></body></html>')
+
+    def poster(self, video_id):
+        """A deterministic 450x630 JPEG per title, rendered once."""
+        with self.lock:
+            if video_id not in self.posters:
+                hue = video_id % 360
+                img = Image.new("RGB", POSTER_SIZE, f"hsl({hue}, 45%, 35%)")
+                ImageDraw.Draw(img).text((20, 20), str(video_id), fill="white")
+                buf = io.BytesIO()
+                img.save(buf, "JPEG", quality=85)
+                self.posters[video_id] = buf.getvalue()
+            return self.posters[video_id]
+
+
+class ReplayServer:
+    """Serves a ReplayFixture on 127.0.0.1 from a background thread, with optional per-response latency."""
+
+    def __init__(self, fixture, latency_ms=LATENCY_MS):
+        self.fixture = fixture
+        self.latency = latency_ms / 1000
+        self.requests = {}
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                kind, status, content_type, body = server.route(parts.path, parse_qs(parts.query))
+                server.requests[kind] = server.requests.get(kind, 0) + 1
+                if server.latency:
+                    time.sleep(server.latency)
+                etag = f'"{zlib.crc32(body):08x}"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def route(self, path, query):
+        fixture = self.fixture
+        if path == LISTING_PATH:
+            return "listing", 200, "text/html; charset=utf-8", fixture.listing_html(self.base).encode("utf-8")
+        if path == fixture.data_path():
+            page = int(query.get("page", ["1"])[0])
+            if page in fixture.pages:
+                payload = {"pageProps": {"data": {"results": fixture.page_results(page, self.base)}}}
+                return "pagination", 200, "application/json", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        match = re.fullmatch(r"/watch/(\d+)", path)
+        if match:
+            body = fixture.detail_html(int(match.group(1)))
+            if body:
+                return "detail", 200, "text/html; charset=utf-8", body.encode("utf-8")
+        match = re.fullmatch(r"/posters/(\d+)\.jpg", path)
+        if match:
+            return "poster", 200, "image/jpeg", fixture.poster(int(match.group(1)))
+        return "missing", 404, "text/plain", b"not recorded"
+
+
+@contextlib.contextmanager
+def replay_target(base):
+    """Points the scraper's listing URL, watch links, watch-link guard and route allowlist at the replay server."""
+    saved = (netflix_scraper.URL, network_capture.WATCH_URL, detail_fetcher.WATCH_HOST, route_policy.NETFLIX_DOMAINS)
+    netflix_scraper.URL = base + LISTING_PATH
+    network_capture.WATCH_URL = base + "/watch/{}"
+    detail_fetcher.WATCH_HOST = urlsplit(base).netloc
+    route_policy.NETFLIX_DOMAINS = saved[3] + ("127.0.0.1",)
+    try:
+        yield
+    finally:
+        netflix_scraper.URL, network_capture.WATCH_URL, detail_fetcher.WATCH_HOST, route_policy.NETFLIX_DOMAINS = saved
+
+
+class PeakRss:
+    """Samples the RSS of this process plus its descendants (Playwright driver, Chromium) in the background."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        if not self.peak:
+            # No /proc (macOS): fall back to this process's own high-water mark
+            import resource
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak = maxrss if sys.platform == "darwin" else maxrss * 1024
+
+    def _tree_rss(self):
+        children, rss = {}, {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            pid = int(entry)
+            children.setdefault(int(fields[1]), []).append(pid)
+            rss[pid] = int(fields[21]) * self.page_size
+        total, stack = 0, [os.getpid()]
+        while stack:
+            pid = stack.pop()
+            total += rss.get(pid, 0)
+            stack.extend(children.get(pid, []))
+        return total
+
+    def _sample(self):
+        if not os.path.isdir("/proc"):
+            return
+        while not self.stopped.is_set():
+            self.peak = max(self.peak, self._tree_rss())
+            self.stopped.wait(self.interval)
+
+
+class BenchmarkSink:
+    """run_log sink that keeps the scraper's structured events (per-stage timings, pages, summary)."""
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.stages = {}
+        self.metrics = {}
+        self.pages = 0
+        self.summary = {}
+
+    def log(self, line):
+        if self.verbose:
+            print(line, flush=True)
+
+    def event(self, kind, data):
+        if kind == "stage":
+            self.stages[data["name"]] = self.stages.get(data["name"], 0) + data.get("seconds", 0)
+        elif kind == "metrics":
+            self.metrics = data  # Cumulative, so the last snapshot covers the whole run
+        elif kind == "page":
+            self.pages += 1
+        elif kind == "summary":
+            self.summary = data
+
+
+async def run_scrape(options, verbose=False):
+    sink = BenchmarkSink(verbose)
+    token = run_log.set_sink(sink)
+    try:
+        with PeakRss() as rss:
+            t0 = time.perf_counter()
+            await netflix_scraper.scrape_netflix_data(
+                extract_mode=options.get("extract_mode", "dom"),
+                detail_concurrency=options.get("detail_concurrency", 1),
+            )
+            wall = time.perf_counter() - t0
+    finally:
+        run_log.reset_sink(token)
+    items = sink.summary.get("total", 0)
+    # Summed per-stage latencies from the scraper's metrics; the coarser stage events otherwise
+    stages = {name: hist["sum"] for name, hist in sink.metrics.get("stages", {}).items()} or sink.stages
+    return {
+        "wall_s": round(wall, 3),
+        "pages": sink.pages,
+        "items": items,
+        "pages_per_s": round(sink.pages / wall, 3),
+        "items_per_s": round(items / wall, 3),
+        "peak_rss_mb": round(rss.peak / 1024 / 1024, 1),
+        "stages": {name: round(seconds, 3) for name, seconds in sorted(stages.items())},
+    }
+
+
+def run_scenario(name, server, verbose=False):
+    """Runs one scenario in a scratch working directory, so caches, CSV and posters start empty."""
+    options = SCENARIOS[name]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+        os.chdir(workdir)
+        try:
+            if options.get("warm"):
+                asyncio.run(run_scrape(options))  # Fill the metadata cache and poster store first
+            server.requests.clear()
+            result = asyncio.run(run_scrape(options, verbose))
+        finally:
+            os.chdir(cwd)
+    result["requests"] = dict(server.requests)
+    return result
+
+
+def compare(results, baselines, tolerance):
+    """Lines describing regressions against the stored baselines (empty when everything is in range)."""
+    problems = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if not baseline:
+            continue
+        if result["items"] != baseline.get("items"):
+            problems.append(f"{name}: scraped {result['items']} items, baseline {baseline.get('items')}")
+        for metric, higher_is_better in BASELINE_METRICS:
+            old, new = baseline.get(metric), result[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                problems.append(f"{name}: {metric} {new} vs baseline {old} ({change:+.0%})")
+    return problems
+
+
+def print_table(results, baselines, latency_ms):
+    print(f"\nScrape benchmark (replayed listing, {latency_ms:.0f}ms per response)")
+    print(f"{'scenario':<20}{'wall':>9}{'pages/s':>10}{'items/s':>10}{'peak RSS':>11}{'baseline':>11}")
+    for name, r in results.items():
+        base = baselines.get(name, {}).get("wall_s")
+        print(f"{name:<20}{r['wall_s']:>8.2f}s{r['pages_per_s']:>10.2f}{r['items_per_s']:>10.2f}"
+              f"{r['peak_rss_mb']:>8.0f} MB{f'{base:>10.2f}s' if base else '         -'}")
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in r["stages"].items())
+        print(f"{'':<20}{r['items']} items, {r['pages']} pages; {stages or 'no stage timings'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scraper end to end against a local replay of the listing")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Scenario to run; repeatable (default: all)")
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS, help="Delay added to every replayed response")
+    parser.add_argument("--baselines", default=BASELINES_FILE, help="Baseline file to compare against / update")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="Allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the scraper's log output")
+    args = parser.parse_args()
+
+    try:
+        with open(args.baselines, encoding="utf-8") as f:
+            baselines = json.load(f)
+    except (OSError, ValueError):
+        baselines = {}
+
+    fixture = ReplayFixture()
+    results = {}
+    with ReplayServer(fixture, args.latency_ms) as server, replay_target(server.base):
+        for name in args.scenario or list(SCENARIOS):
+            results[name] = run_scenario(name, server, args.verbose)
+            if results[name]["items"] != fixture.total_items:
+                print(f"Warning: {name} scraped {results[name]['items']} of {fixture.total_items} replayed titles")
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print_table(results, baselines, args.latency_ms)
+
+    if args.save_baseline:
+        baselines.update({name: {k: v for k, v in r.items() if k != "requests"} for name, r in results.items()})
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2)
+        print(f"\nSaved baselines for {', '.join(results)} to {args.baselines}")
+        sys.exit(0)
+
+    problems = compare(results, baselines, args.tolerance)
+    if problems:
+        print("\nRegressions:")
+        for line in problems:
+            print(f"  {line}")
+        sys.exit(1)
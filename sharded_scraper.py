@@ -0,0 +1,219 @@
+import os
+import re
+import time
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from netflix_scraper import scrape_netflix_data, OUTPUT_DIR, CSV_FILE, DETAIL_CONCURRENCY, DOWNLOAD_CONCURRENCY, EXTRACT_MODE
+from record_sink import CsvSink, RECORD_FIELDS, read_csv_records
+from checkpoint import Checkpoint, CHECKPOINT_DIR
+from watermark import watch_id
+from poster_store import PosterStore
+from run_log import log, set_sink, EventFileSink
+
+# Usage: python sharded_scraper.py --locale zh_cn --locale en --window 2026/2/1:2026/2/15 [--max-workers 4]
+#
+# Each (locale, date window) shard runs the normal scraper in its own process with its own Chromium,
+# writing to shards/<shard>/; the shard datasets are then merged into one CSV, deduplicated by watch ID.
+
+LOCALE_URL = "https://about.netflix.com/{}/new-to-watch"
+SHARDS_DIR = "shards"
+SHARD_MEMORY_MB = 700  # Rough peak RSS of one shard: Python + Playwright driver + Chromium with a few tabs
+MEMORY_FRACTION = 0.75  # Share of the currently available memory the shards may use by default
+MERGED_FIELDS = RECORD_FIELDS + ["Locales"]
+
+
+class ShardSink(EventFileSink):
+    """Prefixes every log line with the shard name, so interleaved output stays readable."""
+
+    def __init__(self, path, name):
+        super().__init__(path)
+        self.prefix = f"[{name}] "
+
+    def log(self, line):
+        print(self.prefix + line, flush=True)
+
+
+def locale_of(url):
+    match = re.search(r"netflix\.com/([a-z]{2}(?:[_-][a-z]{2})?)/", url)
+    return match.group(1) if match else None
+
+
+def parse_window(text):
+    """Parses a START:END window such as 2026/2/1:2026/2/15; either side may be left empty."""
+    start, sep, end = text.partition(":")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"window '{text}' is not START:END")
+    return start.strip() or None, end.strip() or None
+
+
+def plan_shards(locales, urls, windows, root=SHARDS_DIR):
+    """One shard per (listing, window), in the order given; earlier listings win when titles are merged."""
+    targets = [(locale, LOCALE_URL.format(locale)) for locale in locales]
+    targets += [(locale_of(url) or f"url{i + 1}", url) for i, url in enumerate(urls)]
+    shards = []
+    for label, url in targets:
+        for i, (start, end) in enumerate(windows or [(None, None)]):
+            name = label if len(windows or [None]) == 1 else f"{label}-w{i + 1}"
+            shards.append({"name": name, "locale": label, "url": url, "start": start, "end": end,
+                           "dir": os.path.join(root, name)})
+    return shards
+
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo, None where that isn't readable."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def plan_workers(shard_count, max_workers=None, memory_mb=None):
+    """Worker processes for `shard_count` shards within the core budget and the memory budget."""
+    cores = max_workers or os.cpu_count() or 1
+    if memory_mb is None:
+        available = available_memory_mb()
+        memory_mb = available * MEMORY_FRACTION if available else None
+    by_memory = max(1, int(memory_mb // SHARD_MEMORY_MB)) if memory_mb else cores
+    return max(1, min(shard_count, cores, by_memory))
+
+
+def run_shard(shard, options, resume=False):
+    """Worker process entry point: scrapes one shard into its own directory and reports how it went."""
+    os.makedirs(shard["dir"], exist_ok=True)
+    sink = ShardSink(os.path.join(shard["dir"], "events.jsonl"), shard["name"])
+    set_sink(sink)
+    checkpoint_dir = os.path.join(shard["dir"], CHECKPOINT_DIR)
+    t0 = time.perf_counter()
+    try:
+        previous = Checkpoint.load(shard["name"], checkpoint_dir) if resume else None
+    except FileNotFoundError:
+        previous = None
+    try:
+        if previous and previous.state["status"] == "completed":
+            log("Already completed, reusing its records.")
+        else:
+            asyncio.run(scrape_netflix_data(
+                shard["start"], shard["end"],
+                output_dir=os.path.join(shard["dir"], OUTPUT_DIR), csv_file=os.path.join(shard["dir"], CSV_FILE),
+                run_id=shard["name"], resume=previous is not None, checkpoint_dir=checkpoint_dir,
+                listing_url=shard["url"], resume_hint="sharded_scraper.py --resume", **options))
+        return {"name": shard["name"], "status": "completed", "seconds": time.perf_counter() - t0}
+    except Exception as e:
+        log(f"Shard failed: {e}")
+        return {"name": shard["name"], "status": "failed", "seconds": time.perf_counter() - t0, "error": str(e)[:200]}
+    finally:
+        sink.close()
+
+
+def merge_shards(shards, csv_file=CSV_FILE, output_dir=OUTPUT_DIR):
+    """
+    Merges the shard datasets into `csv_file`, one row per watch ID: the first shard to list a title
+    (in the order the listings were given) provides the row, "Locales" lists every locale it appeared in. Posters are
+    linked from the shard folders into `output_dir` rather than copied. Returns the merged records.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    store = PosterStore()
+    merged = {}
+    for shard in shards:
+        shard_csv = os.path.join(shard["dir"], CSV_FILE)
+        if not os.path.exists(shard_csv):
+            continue
+        for record in read_csv_records(shard_csv):
+            key = watch_id(record.get("Watch URL")) or record.get("Title")
+            if key in merged:
+                locales = merged[key]["Locales"].split(",")
+                if shard["locale"] not in locales:
+                    merged[key]["Locales"] = ",".join(locales + [shard["locale"]])
+                continue
+            merged[key] = dict(record, Locales=shard["locale"])
+            poster = os.path.join(shard["dir"], OUTPUT_DIR, record.get("Poster Filename") or "")
+            if os.path.isfile(poster):
+                store.link(poster, os.path.join(output_dir, os.path.basename(poster)))
+
+    sink = CsvSink(csv_file, fields=MERGED_FIELDS)
+    for record in merged.values():
+        sink.write(record)
+    sink.close()
+    return list(merged.values())
+
+
+def run_sharded(shards, options, workers, resume=False):
+    """
+    Runs every shard on one process pool. Descriptions and posters are deduplicated through the
+    metadata cache and poster store, which all processes share on disk: a title one shard has
+    fetched is a cache hit for the others. Only a title that two shards fetch at the same moment
+    is fetched twice.
+    """
+    results = []
+    # Spawned, not forked: every worker starts its own event loop and Playwright driver from scratch
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(run_shard, shard, options, resume): shard for shard in shards}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # The worker process itself died (OOM kill, crash)
+                result = {"name": futures[future]["name"], "status": "failed", "seconds": 0, "error": str(e)[:200]}
+            log(f"Shard {result['name']}: {result['status']} in {result['seconds']:.1f}s"
+                f"{' - ' + result['error'] if result.get('error') else ''}")
+            results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape several Netflix locales / date windows in parallel processes")
+    parser.add_argument("--locale", action="append", default=[], help="Listing locale, e.g. zh_cn, en, ja; repeatable")
+    parser.add_argument("--url", action="append", default=[], help="Full listing URL instead of a locale; repeatable")
+    parser.add_argument("--window", action="append", type=parse_window, default=[],
+                        help="Date window START:END (YYYY/M/D, either side optional); repeatable")
+    parser.add_argument("--max-workers", type=int, default=None, help="Core budget: worker processes (default: CPU count)")
+    parser.add_argument("--memory-mb", type=float, default=None,
+                        help=f"Memory budget in MB, ~{SHARD_MEMORY_MB} MB per shard (default: 75%% of available)")
+    parser.add_argument("--shards-dir", default=SHARDS_DIR, help="Where each shard writes its own CSV and images")
+    parser.add_argument("--csv", default=CSV_FILE, help="Merged dataset")
+    parser.add_argument("--images", default=OUTPUT_DIR, help="Merged poster folder")
+    parser.add_argument("--detail-concurrency", type=int, default=DETAIL_CONCURRENCY,
+                        help="Detail pages fetching synopses in parallel, per shard")
+    parser.add_argument("--download-concurrency", type=int, default=DOWNLOAD_CONCURRENCY,
+                        help="Poster downloads in flight, per shard")
+    parser.add_argument("--extract", choices=["dom", "network"], default=EXTRACT_MODE,
+                        help="Read titles from the rendered DOM or from the listing's JSON responses")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the metadata cache")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reuse completed shards and continue interrupted ones from their checkpoints")
+    args = parser.parse_args()
+
+    if not args.locale and not args.url:
+        parser.error("give at least one --locale or --url")
+    shards = plan_shards(args.locale, args.url, args.window, args.shards_dir)
+    names = [s["name"] for s in shards]
+    if len(set(names)) != len(names):
+        parser.error(f"shard names collide: {', '.join(names)}")
+    workers = plan_workers(len(shards), args.max_workers, args.memory_mb)
+    log(f"{len(shards)} shards on {workers} worker processes: {', '.join(names)}")
+
+    options = {
+        "detail_concurrency": args.detail_concurrency,
+        "download_concurrency": args.download_concurrency,
+        "extract_mode": args.extract,
+        "refresh": args.refresh,
+    }
+    t0 = time.perf_counter()
+    results = run_sharded(shards, options, workers, args.resume)
+    failed = [r["name"] for r in results if r["status"] != "completed"]
+    # A failed shard may still hold the CSV of an earlier run; only this run's completed shards are merged
+    completed = [s for s in shards if s["name"] not in failed]
+    if completed:
+        merged = merge_shards(completed, args.csv, args.images)
+        log(f"\nMerged {len(merged)} titles from {len(completed)}/{len(shards)} shards into {args.csv} "
+            f"in {time.perf_counter() - t0:.1f}s")
+    else:
+        log(f"\nNo shard completed, {args.csv} left untouched.")
+    if failed:
+        log(f"Failed shards: {', '.join(failed)} (rerun with --resume to continue them)")
+    raise SystemExit(1 if failed else 0)
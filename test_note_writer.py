@@ -0,0 +1,93 @@
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from note_writer import NoteWriter
+
+# NoteWriter against a local OpenAI-compatible stub (what OPENAI_BASE_URL points at in development)
+
+CHUNKS = ["**周末", "片单**", " 来了 🎬"]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StubHandler.requests.append(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for text in CHUNKS:
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                     "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    StubHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+def make_writer(stub_url, tmp_path):
+    return NoteWriter(api_key="test", base_url=stub_url, timeout=5, cache_path=str(tmp_path / "notes.db"))
+
+
+async def collect(writer, movies):
+    return [item async for item in writer.stream(movies)]
+
+
+def test_stream_yields_deltas_then_clean_note(stub_url, tmp_path):
+    async def run():
+        writer = make_writer(stub_url, tmp_path)
+        try:
+            return await collect(writer, ["Movie A (2026/2/1)"])
+        finally:
+            await writer.close()
+
+    items = asyncio.run(run())
+    assert [item[1] for item in items[:-1]] == CHUNKS
+    assert all(item[0] == "delta" for item in items[:-1])
+    assert items[-1] == ("done", "周末片单 来了 🎬", False)
+    assert StubHandler.requests[0]["stream"] is True
+    assert "Movie A (2026/2/1)" in StubHandler.requests[0]["messages"][1]["content"]
+
+
+def test_second_call_is_a_cache_hit(stub_url, tmp_path):
+    async def run():
+        writer = make_writer(stub_url, tmp_path)
+        try:
+            await collect(writer, ["Movie A"])
+            return await collect(writer, ["Movie A"])
+        finally:
+            await writer.close()
+
+    assert asyncio.run(run()) == [("done", "周末片单 来了 🎬", True)]
+    assert len(StubHandler.requests) == 1
+
+
+def test_generate_returns_the_full_note(stub_url, tmp_path):
+    async def run():
+        writer = make_writer(stub_url, tmp_path)
+        try:
+            first = await writer.generate(["Movie B"], override_title="本周必看")
+            second = await writer.generate(["Movie B"], override_title="本周必看")
+            return first, second
+        finally:
+            await writer.close()
+
+    first, second = asyncio.run(run())
+    assert first == second == "周末片单 来了 🎬"
+    assert len(StubHandler.requests) == 1
+    assert "本周必看" in StubHandler.requests[0]["messages"][1]["content"]
@@ -0,0 +1,29 @@
+from PIL import Image
+from verify_dimensions import verify_images, TARGET_WIDTH, TARGET_HEIGHT, TITLE_PAGE
+
+
+def make_image(path, size):
+    Image.new("RGB", size, (200, 30, 30)).save(path, "JPEG")
+
+
+def test_fix_repairs_posters_and_leaves_the_title_page_alone(tmp_path):
+    make_image(tmp_path / "Poster.jpg", (500, 700))
+    make_image(tmp_path / TITLE_PAGE, (1242, 1656))
+
+    report = verify_images(str(tmp_path), fix=True)
+
+    assert [r["file"] for r in report["results"]] == ["Poster.jpg"]
+    assert report["fixed"] == 1 and report["failed"] == 0
+    with Image.open(tmp_path / "Poster.jpg") as img:
+        assert img.size == (TARGET_WIDTH, TARGET_HEIGHT)
+    with Image.open(tmp_path / TITLE_PAGE) as img:
+        assert img.size == (1242, 1656)
+
+
+def test_check_mode_does_not_fail_on_the_title_page(tmp_path):
+    make_image(tmp_path / "Poster.jpg", (TARGET_WIDTH, TARGET_HEIGHT))
+    make_image(tmp_path / TITLE_PAGE, (1242, 1656))
+
+    report = verify_images(str(tmp_path))
+
+    assert report["total"] == 1 and report["passed"] == 1 and report["failed"] == 0
@@ -0,0 +1,116 @@
+import time
+import threading
+from contextlib import contextmanager
+from run_log import log, event
+
+
+def percentile(values, pct):
+    if not values: return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class LatencyStats:
+    """Collects latency samples per name and prints a p50/p95/max table."""
+
+    def __init__(self, label):
+        self.label = label
+        self.samples = {}
+        self.timeouts = {}
+
+    def record(self, name, seconds, timed_out=False):
+        self.samples.setdefault(name, []).append(seconds)
+        if timed_out:
+            self.timeouts[name] = self.timeouts.get(name, 0) + 1
+
+    def report(self):
+        if not self.samples:
+            return
+        log(f"\n{self.label}:")
+        for name, values in sorted(self.samples.items()):
+            log(f"  {name:<22} n={len(values):<4} total {sum(values):6.1f}s  "
+                f"p50 {percentile(values, 50) * 1000:6.0f}ms  p95 {percentile(values, 95) * 1000:6.0f}ms  "
+                f"max {max(values) * 1000:6.0f}ms  timeouts {self.timeouts.get(name, 0)}")
+
+
+# Upper bounds (seconds) of the stage latency histograms, shared by every job so they can be summed
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class StageMetrics(LatencyStats):
+    """
+    Per-stage latencies plus event counters for one scrape run.
+
+    Safe to feed from the poster/detail threads. snapshot() turns the samples into cumulative
+    Prometheus-style histograms; emit() publishes that snapshot as a "metrics" event, which the
+    API keeps per job and aggregates on /metrics.
+    """
+
+    def __init__(self, label="Stage timings"):
+        super().__init__(label)
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds, timed_out=False):
+        with self.lock:
+            super().record(name, seconds, timed_out)
+
+    @contextmanager
+    def time(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - t0)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self.lock:
+            stages = {
+                name: {
+                    "count": len(values),
+                    "sum": round(sum(values), 6),
+                    "buckets": [sum(1 for v in values if v <= bound) for bound in HISTOGRAM_BUCKETS],
+                }
+                for name, values in self.samples.items()
+            }
+            return {"stages": stages, "counters": dict(self.counters)}
+
+    def emit(self):
+        event("metrics", **self.snapshot())
+
+
+def merge_snapshots(snapshots):
+    """Sums StageMetrics snapshots (e.g. every job the API knows about) into one."""
+    merged = {"stages": {}, "counters": {}}
+    for snap in snapshots:
+        for name, hist in snap.get("stages", {}).items():
+            total = merged["stages"].setdefault(name, {"count": 0, "sum": 0.0, "buckets": [0] * len(HISTOGRAM_BUCKETS)})
+            total["count"] += hist["count"]
+            total["sum"] += hist["sum"]
+            total["buckets"] = [a + b for a, b in zip(total["buckets"], hist["buckets"])]
+        for name, value in snap.get("counters", {}).items():
+            merged["counters"][name] = merged["counters"].get(name, 0) + value
+    return merged
+
+
+def prometheus_text(snapshot, prefix="scraper"):
+    """Prometheus text exposition of a snapshot: one stage-labelled histogram plus a counter per name."""
+    lines = [
+        f"# HELP {prefix}_stage_seconds Time spent per scrape stage",
+        f"# TYPE {prefix}_stage_seconds histogram",
+    ]
+    for name, hist in sorted(snapshot["stages"].items()):
+        for bound, n in zip(HISTOGRAM_BUCKETS, hist["buckets"]):
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {n}')
+        lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {hist["count"]}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {hist["sum"]:.6f}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {hist["count"]}')
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,69 @@
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+from browser_pool import BrowserPool
+from title_generator.generate_image import generate_title_image
+
+# Usage (from the repo root): python -m title_generator.benchmark --runs 10
+
+
+async def time_renders(label, runs, render):
+    timings = []
+    for i in range(runs):
+        t0 = time.perf_counter()
+        path = await render(i)
+        if not path:
+            return label, None
+        timings.append(time.perf_counter() - t0)
+    timings.sort()
+    return label, timings
+
+
+async def run_benchmark(runs, output_dir, include_browser=True):
+    out = lambda i: os.path.join(output_dir, f"bench_{i}.jpg")
+    # Distinct titles per run so uncached paths never hit the render cache
+    date = lambda i: f"2月{i % 28 + 1}日～2月{i % 28 + 2}日"
+
+    results = [
+        await time_renders("pillow", runs,
+                           lambda i: generate_title_image("收视冠军", date(i), out(i), renderer="pillow", use_cache=False)),
+    ]
+    # Prime one entry, then measure pure cache hits
+    await generate_title_image("收视冠军", "缓存命中", out(0), renderer="pillow")
+    results.append(await time_renders("cache hit", runs,
+                                      lambda i: generate_title_image("收视冠军", "缓存命中", out(i), renderer="pillow")))
+
+    if include_browser:
+        results.append(await time_renders("browser (cold launch)", runs,
+                                          lambda i: generate_title_image("收视冠军", date(i), out(i), use_cache=False)))
+        pool = BrowserPool()
+        try:
+            await pool.start()
+            results.append(await time_renders("browser (warm pool)", runs,
+                                              lambda i: generate_title_image("收视冠军", date(i), out(i),
+                                                                             browser_pool=pool, use_cache=False)))
+        except Exception as e:
+            print(f"Warm pool unavailable: {e}")
+        finally:
+            await pool.stop()
+
+    print(f"\nTitle page render benchmark ({runs} runs each)")
+    print(f"{'path':<24}{'mean':>10}{'p50':>10}{'max':>10}")
+    for label, timings in results:
+        if not timings:
+            print(f"{label:<24}{'unavailable':>30}")
+            continue
+        mean = sum(timings) / len(timings)
+        print(f"{label:<24}{mean * 1000:>8.0f}ms{timings[len(timings) // 2] * 1000:>8.0f}ms{timings[-1] * 1000:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the browser and Pillow title page renderers")
+    parser.add_argument("--runs", type=int, default=5, help="Renders per path")
+    parser.add_argument("--skip-browser", action="store_true", help="Only benchmark the browser-free paths")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run_benchmark(args.runs, tmp, include_browser=not args.skip_browser))
@@ -1,9 +1,61 @@
 import argparse
-from playwright.async_api import async_playwright
 import os
+import sys
 import asyncio
+import hashlib
+import shutil
+from functools import lru_cache
 
-async def generate_title_image(title, date_range, output_path=None):
+# Usage: python title_generator/generate_image.py --title ... [--renderer pillow] [--no-cache]
+# (or python -m title_generator.generate_image from the repo root)
+if not __package__:
+    # Run as a script, only title_generator/ is on sys.path; browser_pool and the package live one level up
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_pool import open_context
+from title_generator.pillow_renderer import render_title_image
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_FILES = ["index.html", "style.css", "script.js", "Background.jpg"]
+RENDER_CACHE_DIR = os.path.join(SCRIPT_DIR, ".render_cache")
+
+@lru_cache(maxsize=64)
+def _file_digest(path, mtime_ns, size):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def render_cache_key(title, date_range, renderer="browser"):
+    """Hash of the texts, the renderer and every template file, so editing the template invalidates the cache."""
+    files = TEMPLATE_FILES + (["pillow_renderer.py"] if renderer == "pillow" else [])
+    h = hashlib.sha256("\0".join([renderer, title, date_range]).encode("utf-8"))
+    for name in files:
+        path = os.path.join(SCRIPT_DIR, name)
+        st = os.stat(path)
+        h.update(_file_digest(path, st.st_mtime_ns, st.st_size).encode("ascii"))
+    return h.hexdigest()
+
+async def render_with_browser(title, date_range, output_path, browser_pool=None):
+    file_url = f"file://{os.path.join(SCRIPT_DIR, 'index.html')}"
+    
+    # URL with parameters
+    url = f"{file_url}?title={title}&date={date_range}"
+    
+    # Set viewport to exact dimensions required (1242x1656)
+    async with open_context(browser_pool, viewport={"width": 1242, "height": 1656}) as context:
+        page = await context.new_page()
+        
+        print(f"Generating Title Page: {url}")
+        await page.goto(url)
+        
+        # Ensure the element is visible
+        await page.wait_for_selector("#capture")
+        
+        # Taking screenshot full page
+        await page.screenshot(path=output_path, full_page=True, type="jpeg", quality=90)
+    return output_path
+
+async def generate_title_image(title, date_range, output_path=None, browser_pool=None, renderer="browser",
+                               use_cache=True):
     """
     Generates a Redbook title page image (Async).
     
@@ -11,49 +63,48 @@ async def generate_title_image(title, date_range, output_path=None):
         title (str): Main title text (e.g., "收视冠军")
         date_range (str): Date range text (e.g., "2月9日～2月15日")
         output_path (str): Absolute path to save the image. If None, returns None.
+        browser_pool (BrowserPool): Warm pool to borrow a context from; launches Chromium if None.
+        renderer (str): "browser" screenshots index.html, "pillow" draws the same layout without a browser.
+        use_cache (bool): Reuse a previous render of the same (title, date_range, template).
         
     Returns:
         str: Path to the generated image.
     """
     if not output_path:
         return None
-        
-    # Current directory where this script resides
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    file_url = f"file://{os.path.join(script_dir, 'index.html')}"
-    
-    # URL with parameters
-    url = f"{file_url}?title={title}&date={date_range}"
+
+    cached_path = os.path.join(RENDER_CACHE_DIR, render_cache_key(title, date_range, renderer) + ".jpg")
+    if use_cache and os.path.exists(cached_path):
+        shutil.copyfile(cached_path, output_path)
+        print(f"Title Page Generated (cached): {output_path}")
+        return output_path
     
     try:
-        async with async_playwright() as p:
-            # Launch browser
-            browser = await p.chromium.launch()
-            # Set viewport to exact dimensions required (1242x1656)
-            page = await browser.new_page(viewport={"width": 1242, "height": 1656})
-            
-            print(f"Generating Title Page: {url}")
-            await page.goto(url)
-            
-            # Ensure the element is visible
-            await page.wait_for_selector("#capture")
-            
-            # Taking screenshot full page
-            await page.screenshot(path=output_path, full_page=True, type="jpeg", quality=90)
-            
-            print(f"Title Page Generated: {output_path}")
-            await browser.close()
-            return output_path
+        if renderer == "pillow":
+            await asyncio.to_thread(render_title_image, title, date_range, output_path)
+        else:
+            await render_with_browser(title, date_range, output_path, browser_pool)
+        print(f"Title Page Generated: {output_path}")
     except Exception as e:
         print(f"Error generating title page: {e}")
         return None
 
+    if use_cache:
+        os.makedirs(RENDER_CACHE_DIR, exist_ok=True)
+        tmp_path = cached_path + ".part"
+        shutil.copyfile(output_path, tmp_path)
+        os.replace(tmp_path, cached_path)
+    return output_path
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate Redbook Title Page Image")
     parser.add_argument("--title", default="收视冠军", help="Main title text")
     parser.add_argument("--date", default="2月9日～2月15日", help="Date range text")
     parser.add_argument("--output", default="Title_Page.jpg", help="Output filename")
+    parser.add_argument("--renderer", choices=["browser", "pillow"], default="browser", help="Rendering backend")
+    parser.add_argument("--no-cache", action="store_true", help="Always render, ignoring the render cache")
     
     args = parser.parse_args()
     
-    generate_title_image(args.title, args.date, os.path.abspath(args.output))
+    asyncio.run(generate_title_image(args.title, args.date, os.path.abspath(args.output),
+                                     renderer=args.renderer, use_cache=not args.no_cache))
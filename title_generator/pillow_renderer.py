@@ -0,0 +1,83 @@
+import os
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKGROUND = os.path.join(SCRIPT_DIR, "Background.jpg")
+WIDTH, HEIGHT = 1242, 1656
+
+# Mirrors style.css: .content margin-top, gap, and the .title / .subtitle typography
+CONTENT_TOP = 1050
+GAP = 50
+TITLE_STYLE = {"size": 220, "line_height": 1.0, "letter_spacing": 5, "opacity": 1.0,
+               "shadow_offset": 6, "shadow_blur": 15}
+SUBTITLE_STYLE = {"size": 100, "line_height": None, "letter_spacing": 3, "opacity": 0.95,
+                  "shadow_offset": 4, "shadow_blur": 10}
+SHADOW_ALPHA = 0.6
+
+# Bold CJK faces matching the CSS font stack ("PingFang SC", "Noto Sans SC", "Microsoft YaHei"),
+# as (path, collection index). TITLE_FONT=/path/to/font overrides the search.
+FONT_CANDIDATES = [
+    ("/System/Library/Fonts/PingFang.ttc", 0),
+    ("/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc", 2),
+    ("/usr/share/fonts/noto-cjk/NotoSansCJK-Bold.ttc", 2),
+    ("/usr/share/fonts/google-noto-cjk/NotoSansCJK-Bold.ttc", 2),
+    ("/usr/share/fonts/truetype/noto/NotoSansSC-Bold.otf", 0),
+    ("C:/Windows/Fonts/msyhbd.ttc", 0),
+]
+
+
+@lru_cache(maxsize=None)
+def load_font(size):
+    override = os.getenv("TITLE_FONT")
+    candidates = [(override, 0)] if override else FONT_CANDIDATES
+    for path, index in candidates:
+        if path and os.path.exists(path):
+            return ImageFont.truetype(path, size, index=index)
+    print("Warning: no CJK font found for the Pillow renderer (set TITLE_FONT); using Pillow's default font")
+    return ImageFont.load_default(size)
+
+
+def _draw_line(canvas, text, top, style):
+    """Draws one centered line with CSS-like letter-spacing, line box and blurred drop shadow."""
+    font = load_font(style["size"])
+    ascent, descent = font.getmetrics()
+    line_height = style["size"] * style["line_height"] if style["line_height"] else ascent + descent
+    baseline = top + (line_height - (ascent + descent)) / 2 + ascent
+
+    advances = [font.getlength(ch) + style["letter_spacing"] for ch in text]
+    x = (WIDTH - sum(advances)) / 2
+
+    shadow = Image.new("RGBA", canvas.size, (0, 0, 0, 0))
+    glyphs = Image.new("RGBA", canvas.size, (0, 0, 0, 0))
+    shadow_draw = ImageDraw.Draw(shadow)
+    glyph_draw = ImageDraw.Draw(glyphs)
+    shadow_fill = (0, 0, 0, int(255 * SHADOW_ALPHA))
+    text_fill = (255, 255, 255, int(255 * style["opacity"]))
+    for ch, advance in zip(text, advances):
+        shadow_draw.text((x, baseline + style["shadow_offset"]), ch, font=font, fill=shadow_fill, anchor="ls")
+        glyph_draw.text((x, baseline), ch, font=font, fill=text_fill, anchor="ls")
+        x += advance
+
+    # CSS blur radius is roughly two standard deviations of the Gaussian
+    canvas.alpha_composite(shadow.filter(ImageFilter.GaussianBlur(style["shadow_blur"] / 2)))
+    canvas.alpha_composite(glyphs)
+    return top + line_height
+
+
+def render_title_image(title, date_range, output_path):
+    """Draws the index.html layout straight onto Background.jpg, no browser involved."""
+    with Image.open(BACKGROUND) as bg:
+        canvas = bg.convert("RGBA")
+    if canvas.size != (WIDTH, HEIGHT):
+        # background-size: cover; background-position: center
+        scale = max(WIDTH / canvas.width, HEIGHT / canvas.height)
+        canvas = canvas.resize((round(canvas.width * scale), round(canvas.height * scale)), Image.LANCZOS)
+        left, top = (canvas.width - WIDTH) // 2, (canvas.height - HEIGHT) // 2
+        canvas = canvas.crop((left, top, left + WIDTH, top + HEIGHT))
+
+    bottom = _draw_line(canvas, title, CONTENT_TOP, TITLE_STYLE)
+    _draw_line(canvas, date_range, bottom + GAP, SUBTITLE_STYLE)
+
+    canvas.convert("RGB").save(output_path, "JPEG", quality=90)
+    return output_path
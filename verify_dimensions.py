@@ -1,48 +1,182 @@
 import os
+import sys
+import json
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 
 IMAGE_DIR = "images"
 TARGET_WIDTH = 450
 TARGET_HEIGHT = 630
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+TITLE_PAGE = "Title_Page.jpg"  # The 1242x1656 cover /api/generate_title writes next to the posters; not a poster
+HEADER_CHUNK = 64 * 1024  # Read buffer while walking JPEG segments; a poster's SOF is usually inside the first one
 
-def verify_images():
-    if not os.path.exists(IMAGE_DIR):
-        print(f"Error: Directory '{IMAGE_DIR}' not found. Run netflix_scraper.py first.")
-        return
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Start-of-frame markers carry the dimensions; C4 (DHT), C8 (JPG) and CC (DAC) share the range but don't
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_dimensions(f):
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        if byte != b"\xff":
+            raise ValueError("Truncated JPEG header" if not byte else "Corrupt JPEG: expected a marker")
+        marker = f.read(1)
+        while marker == b"\xff":  # Fill bytes before a marker
+            marker = f.read(1)
+        if not marker:
+            raise ValueError("Truncated JPEG header")
+        code = marker[0]
+        if code == 0xD9 or code == 0xDA:
+            raise ValueError("JPEG has no frame header before the image data")
+        if 0xD0 <= code <= 0xD8 or code == 0x01:
+            continue  # Standalone markers, no length
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            raise ValueError("Truncated JPEG header")
+        length = struct.unpack(">H", length_bytes)[0]
+        if code in JPEG_SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5:
+                raise ValueError("Truncated JPEG frame header")
+            height, width = struct.unpack(">HH", data[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def read_dimensions(path):
+    """(width, height) from the file header only: the PNG IHDR chunk or the JPEG SOF segment. No pixels are decoded."""
+    with open(path, "rb", buffering=HEADER_CHUNK) as f:
+        head = f.read(24)
+        if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head.startswith(b"\xff\xd8"):
+            return _jpeg_dimensions(f)
+    # Anything else (e.g. a WebP saved with a .jpg name): Pillow also only parses the header here
+    with Image.open(path) as img:
+        return img.size
+
+
+def fix_image(path, width=TARGET_WIDTH, height=TARGET_HEIGHT):
+    """
+    Scales the image to cover width x height and center-crops the overflow, then swaps it in atomically.
+    Posters in images/ can be hardlinks into poster_store/; replacing the path (not writing
+    through it) leaves the shared blob untouched.
+    """
+    with Image.open(path) as img:
+        fmt = img.format or "JPEG"
+        img = img.convert("RGB") if fmt == "JPEG" else img.copy()
+    scale = max(width / img.width, height / img.height)
+    img = img.resize((max(width, round(img.width * scale)), max(height, round(img.height * scale))), Image.LANCZOS)
+    left, top = (img.width - width) // 2, (img.height - height) // 2
+    img = img.crop((left, top, left + width, top + height))
+
+    tmp_path = f"{path}.{os.getpid()}.fix"
+    try:
+        if fmt == "JPEG":
+            img.save(tmp_path, fmt, quality=92)
+        else:
+            img.save(tmp_path, fmt)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def verify_poster(path, fix=False):
+    """
+    Checks one image; with fix=True a mismatched one is repaired in place.
+    Returns {"file", "width", "height", "status"} where status is pass, fail, fixed or error.
+    Also the per-poster hook the scraper's downloader calls as each poster lands.
+    """
+    result = {"file": os.path.basename(path), "width": None, "height": None, "status": "pass"}
+    try:
+        width, height = read_dimensions(path)
+        result["width"], result["height"] = width, height
+        if (width, height) != (TARGET_WIDTH, TARGET_HEIGHT):
+            result["status"] = "fail"
+            if fix:
+                fix_image(path)
+                result["status"] = "fixed"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = str(e)
+    return result
+
+
+def _verify_fix(path):
+    return verify_poster(path, fix=True)
 
-    files = [f for f in os.listdir(IMAGE_DIR) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
-    if not files:
-        print("No images found to verify.")
-        return
-
-    print(f"Verifying {len(files)} images...")
-    passed = 0
-    failed = 0
-
-    for filename in files:
-        path = os.path.join(IMAGE_DIR, filename)
-        try:
-            with Image.open(path) as img:
-                w, h = img.size
-                if w == TARGET_WIDTH and h == TARGET_HEIGHT:
-                    # print(f"[PASS] {filename}: {w}x{h}")
-                    passed += 1
-                else:
-                    print(f"[FAIL] {filename}: {w}x{h} (Expected {TARGET_WIDTH}x{TARGET_HEIGHT})")
-                    failed += 1
-        except Exception as e:
-            print(f"[ERROR] Could not open {filename}: {e}")
-            failed += 1
+
+def verify_images(image_dir=IMAGE_DIR, fix=False, workers=None):
+    """Verifies (and optionally repairs) every image in `image_dir` across a process pool. Returns the report dict."""
+    files = sorted(f for f in os.listdir(image_dir) if f.lower().endswith(IMAGE_EXTENSIONS) and f != TITLE_PAGE)
+    paths = [os.path.join(image_dir, f) for f in files]
+    if not paths:
+        results = []
+    elif len(paths) < 32 and not fix:
+        # Header reads take microseconds; a pool only pays off once there is real work
+        results = [verify_poster(p) for p in paths]
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_verify_fix if fix else verify_poster, paths,
+                                    chunksize=max(1, len(paths) // (workers * 4))))
+
+    counts = {status: sum(1 for r in results if r["status"] == status) for status in ("pass", "fail", "fixed", "error")}
+    return {
+        "directory": image_dir,
+        "target": f"{TARGET_WIDTH}x{TARGET_HEIGHT}",
+        "total": len(results),
+        "passed": counts["pass"],
+        "failed": counts["fail"] + counts["error"],
+        "fixed": counts["fixed"],
+        "results": results,
+    }
+
+
+def print_report(report):
+    print(f"Verifying {report['total']} images...")
+    for r in report["results"]:
+        if r["status"] == "fail":
+            print(f"[FAIL] {r['file']}: {r['width']}x{r['height']} (Expected {TARGET_WIDTH}x{TARGET_HEIGHT})")
+        elif r["status"] == "fixed":
+            print(f"[FIXED] {r['file']}: {r['width']}x{r['height']} -> {TARGET_WIDTH}x{TARGET_HEIGHT}")
+        elif r["status"] == "error":
+            print(f"[ERROR] Could not open {r['file']}: {r['error']}")
 
     print("-" * 30)
     print(f"Verification Complete.")
-    print(f"Passed: {passed}")
-    print(f"Failed: {failed}")
-    
-    if failed == 0:
-        print("SUCCESS: All images match the required dimensions (450x630).")
+    print(f"Passed: {report['passed']}")
+    print(f"Fixed: {report['fixed']}")
+    print(f"Failed: {report['failed']}")
+
+    if report["failed"] == 0:
+        print(f"SUCCESS: All images match the required dimensions ({TARGET_WIDTH}x{TARGET_HEIGHT}).")
     else:
         print("WARNING: Some images have incorrect dimensions.")
 
+
 if __name__ == "__main__":
-    verify_images()
+    parser = argparse.ArgumentParser(description="Check that every poster is 450x630")
+    parser.add_argument("--dir", default=IMAGE_DIR, help="Directory of images to verify")
+    parser.add_argument("--fix", action="store_true", help="Resize/crop mismatched images to 450x630 in place")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.dir):
+        print(f"Error: Directory '{args.dir}' not found. Run netflix_scraper.py first.")
+        sys.exit(2)
+
+    report = verify_images(args.dir, fix=args.fix, workers=args.workers)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif report["total"] == 0:
+        print("No images found to verify.")
+    else:
+        print_report(report)
+    sys.exit(1 if report["failed"] else 0)
@@ -0,0 +1,89 @@
+import time
+import asyncio
+from timing import LatencyStats
+
+# Scrolls the listing to the bottom in viewport-sized steps inside the page (one round trip)
+SCROLL_TO_BOTTOM_JS = """
+async (step) => {
+    let last = -1;
+    while (window.scrollY !== last && window.scrollY + window.innerHeight < document.body.scrollHeight) {
+        last = window.scrollY;
+        window.scrollBy(0, step);
+        await new Promise(r => requestAnimationFrame(r));
+    }
+}
+"""
+
+CONTAINER_COUNT_JS = "(selector) => document.querySelectorAll(selector).length"
+
+
+class Waiter:
+    """
+    Waits on real page signals and only falls back to the timeout when the signal never comes.
+
+    Every wait is timed under a name so the run can print the actual latency distribution
+    (and how often each wait timed out) for tuning the timeouts.
+    """
+
+    def __init__(self):
+        self.stats = LatencyStats("Wait timings")
+
+    async def _timed(self, name, awaitable, timeout):
+        t0 = time.perf_counter()
+        timed_out = False
+        try:
+            await asyncio.wait_for(awaitable, timeout)
+        except Exception:
+            timed_out = True
+        self.stats.record(name, time.perf_counter() - t0, timed_out)
+        return not timed_out
+
+    async def for_selector(self, page, selector, name, timeout=10):
+        return await self._timed(name, page.wait_for_selector(selector, timeout=timeout * 1000), timeout)
+
+    async def for_function(self, page, expression, arg=None, name="function", timeout=10):
+        return await self._timed(name, page.wait_for_function(expression, arg=arg, timeout=timeout * 1000), timeout)
+
+    async def for_load_state(self, page, state, name, timeout=10):
+        return await self._timed(name, page.wait_for_load_state(state, timeout=timeout * 1000), timeout)
+
+    async def for_condition(self, predicate, name, timeout=10, interval=0.05):
+        """Waits for an in-process signal, e.g. a captured network payload."""
+        async def poll():
+            while not predicate():
+                await asyncio.sleep(interval)
+        return await self._timed(name, poll(), timeout)
+
+    async def for_stable_count(self, page, selector, name, timeout=10, interval=0.25, settle=3):
+        """Waits until at least one element matches and the count stops changing for `settle` polls."""
+        async def poll():
+            last, same = -1, 0
+            while True:
+                count = await page.evaluate(CONTAINER_COUNT_JS, selector)
+                same = same + 1 if count == last and count > 0 else 0
+                if same >= settle:
+                    return count
+                last = count
+                await asyncio.sleep(interval)
+        return await self._timed(name, poll(), timeout)
+
+    async def for_attribute(self, locator, attribute, name, timeout=2):
+        """Waits until the element behind `locator` has a non-empty `attribute` (e.g. a lazy image src)."""
+        async def poll():
+            handle = await locator.element_handle(timeout=timeout * 1000)
+            await locator.page.wait_for_function("([el, attr]) => !!el.getAttribute(attr)",
+                                                 arg=[handle, attribute], timeout=timeout * 1000)
+        return await self._timed(name, poll(), timeout)
+
+    async def scroll_to_bottom(self, page, selector, step=800, timeout=5):
+        """Scrolls through the lazy-loaded listing and waits for the container count to settle."""
+        t0 = time.perf_counter()
+        try:
+            await page.evaluate(SCROLL_TO_BOTTOM_JS, step)
+        except Exception:
+            pass
+        self.stats.record("scroll", time.perf_counter() - t0)
+        return await self.for_stable_count(page, selector, "scroll settle", timeout=timeout)
+
+    def report(self):
+        self.stats.report()
@@ -0,0 +1,102 @@
+import os
+import re
+import json
+from datetime import datetime
+
+WATCH_ID_RE = re.compile(r"/watch/(\d+)")
+
+
+def watch_id(url):
+    """Numeric title ID from a /watch/<id> link, None for anything else."""
+    match = WATCH_ID_RE.search(url or "")
+    return match.group(1) if match else None
+
+
+def watermark_path(csv_file):
+    return os.path.splitext(csv_file)[0] + ".watermark.json"
+
+
+def _date_key(date_str):
+    try:
+        return datetime.strptime(date_str.strip(), "%Y/%m/%d")
+    except (AttributeError, ValueError):
+        return None
+
+
+class Watermark:
+    """
+    What an incremental run already has: the newest release date in the dataset and every title
+    ID seen so far with the title/date it had. An entry whose title or date differs from the
+    listing counts as changed and is processed again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.newest_date = None
+        self.seen = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.newest_date = data.get("newest_date")
+            self.seen = data.get("seen", {})
+        except (OSError, ValueError):
+            pass
+
+    def is_known(self, title_id, date_str=None, title=None):
+        entry = self.seen.get(title_id)
+        if not entry:
+            return False
+        if date_str and entry.get("date") != date_str:
+            return False
+        if title is not None and entry.get("title") != title:
+            return False
+        return True
+
+    def add(self, title_id, title, date_str):
+        if not title_id:
+            return
+        self.seen[title_id] = {"title": title, "date": date_str}
+        date = _date_key(date_str)
+        if date and (not self.newest_date or date > _date_key(self.newest_date)):
+            self.newest_date = date_str
+
+    def absorb(self, records):
+        for record in records:
+            self.add(watch_id(record.get("Watch URL")), record.get("Title"), record.get("Release Date"))
+
+    def reconcile(self, records):
+        """
+        Rebuilds the watermark from the dataset when the two disagree (missing watermark, a deleted
+        or hand-edited CSV), so a title is never "known" unless it is actually in the dataset.
+        Returns True if it had to rebuild.
+        """
+        ids = {watch_id(record.get("Watch URL")) for record in records} - {None}
+        if ids == set(self.seen):
+            return False
+        self.newest_date = None
+        self.seen = {}
+        self.absorb(records)
+        return True
+
+    def save(self):
+        tmp_path = self.path + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"newest_date": self.newest_date, "seen": self.seen}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def merge_records(records):
+    """
+    Collapses records that share a title ID: the newest version (last in the list) takes the
+    place of the first, so updated titles keep their position in the dataset.
+    """
+    merged = []
+    positions = {}
+    for record in records:
+        key = watch_id(record.get("Watch URL")) or record.get("Title")
+        if key in positions:
+            merged[positions[key]] = record
+        else:
+            positions[key] = len(merged)
+            merged.append(record)
+    return merged